@@ -0,0 +1,114 @@
+"""
+Compare the torch and ONNX Runtime backends of the zero-shot classifier
+(bart-large-mnli) and the embedding model (all-mpnet-base-v2): load time,
+throughput, resident memory and parity with the torch outputs.
+Each backend runs in a fresh process so RSS figures do not mix.
+
+    python benchmarks/bench_backends.py --backends torch onnx onnx-int8
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+
+SAMPLES = [
+    "Tender for supply and installation of escalator spares at Aluva station",
+    "Invoice INV-2231 for Rs. 4,50,000 towards annual maintenance of lifts",
+    "Recruitment notice for station controllers and train operators",
+    "Incident report: signalling failure between Edappally and Palarivattom",
+    "Board resolution approving the revised budget for Phase II works",
+    "Network outage in the SCADA control room, server patching scheduled",
+    "Legal notice regarding the arbitration with the civil contractor",
+    "Passenger feedback on ticketing counters and customer care response",
+]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend: str, rounds: int, queue) -> None:
+    from pipeline import backends
+    from pipeline.departments import KMRL_DEPARTMENTS
+
+    texts = SAMPLES * rounds
+    baseline = rss_mb()
+    result = {"backend": backend}
+
+    start = time.perf_counter()
+    encoder = backends.load_sentence_transformer("all-mpnet-base-v2", backend)
+    result["embed_load_s"] = time.perf_counter() - start
+    encoder.encode(SAMPLES[:2])
+    start = time.perf_counter()
+    vectors = encoder.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)
+    result["embed_texts_per_s"] = len(texts) / (time.perf_counter() - start)
+    result["vectors"] = vectors[:len(SAMPLES)]
+    result["embed_rss_mb"] = rss_mb() - baseline
+
+    start = time.perf_counter()
+    classifier = backends.load_zero_shot("facebook/bart-large-mnli", backend)
+    result["classify_load_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    outputs = [classifier(text, candidate_labels=KMRL_DEPARTMENTS) for text in SAMPLES]
+    result["classify_docs_per_s"] = len(SAMPLES) / (time.perf_counter() - start)
+    result["zero_shot"] = [dict(zip(o["labels"], o["scores"])) for o in outputs]
+    result["total_rss_mb"] = rss_mb() - baseline
+    queue.put(result)
+
+
+def measure(backend: str, rounds: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=run_backend, args=(backend, rounds, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def parity(reference: dict, other: dict) -> str:
+    cosine = (reference["vectors"] * other["vectors"]).sum(axis=1)
+    agree, score_diff = 0, 0.0
+    for ref, out in zip(reference["zero_shot"], other["zero_shot"]):
+        agree += max(ref, key=ref.get) == max(out, key=out.get)
+        score_diff = max(score_diff, max(abs(ref[label] - out[label]) for label in ref))
+    return (
+        f"embedding cosine min {cosine.min():.4f} mean {cosine.mean():.4f} | "
+        f"zero-shot top-1 agreement {agree}/{len(reference['zero_shot'])}, max score diff {score_diff:.4f}"
+    )
+
+
+def main(args):
+    results = [measure(backend, args.rounds) for backend in args.backends]
+    for r in results:
+        print(
+            f"{r['backend']:>10}: embed {r['embed_texts_per_s']:7.1f} texts/s (load {r['embed_load_s']:.1f}s) | "
+            f"zero-shot {r['classify_docs_per_s']:5.2f} docs/s (load {r['classify_load_s']:.1f}s) | "
+            f"RSS embed {r['embed_rss_mb']:.0f} MB, total {r['total_rss_mb']:.0f} MB"
+        )
+    reference = next((r for r in results if r["backend"] == "torch"), None)
+    if reference is None:
+        return
+    for r in results:
+        if r is not reference:
+            print(f"{r['backend']:>10} vs torch: {parity(reference, r)}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    arg_parser.add_argument("--rounds", type=int, default=16, help="Copies of the samples to embed")
+    main(arg_parser.parse_args())
@@ -0,0 +1,92 @@
+"""
+Benchmark the single-pass metadata scanner against the original
+seven re.findall passes plus one re.search per department keyword.
+Only the regex part is timed; spaCy NER is not involved.
+
+    python benchmarks/bench_metadata.py --size-mb 1 4
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pipeline import metadata
+
+SNIPPETS = [
+    "Tender No. KMRL/PROCITENDER/{y}-{yy}/{n} for supply of escalator spares",
+    "Invoice INV-{n} dated {d}/{m}/20{yy} for Rs. {a},000.00 towards maintenance",
+    "Contact the Procurement office at vendor{n}@kmrl.co.in or 98470{n:05d}",
+    "Refer www.kochimetro.org/tenders/{n} and https://kmrl.co.in/doc/{n}",
+    "Maintenance schedule for rolling stock revised by the Engineering wing",
+    "the contractor shall complete the work within the stipulated period",
+    "OCR NOISE |||  l1ne  0f  scanned  text  with  rn  artifacts  ..  ,,",
+]
+
+
+def sample_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines, length = [], 0
+    while length < size:
+        line = rng.choice(SNIPPETS).format(
+            y=rng.randint(2019, 2025), yy=rng.randint(19, 25), n=rng.randint(1, 99999),
+            d=rng.randint(1, 28), m=rng.randint(1, 12), a=rng.randint(1, 999),
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def legacy_regex(text: str) -> dict:
+    """Regex part of the original extract_metadata."""
+    result = {
+        "tender_ids": re.findall(metadata.TENDER_ID_PATTERN, text),
+        "invoice_ids": re.findall(metadata.INVOICE_PATTERN, text),
+        "amounts": re.findall(metadata.AMOUNT_PATTERN, text),
+        "dates": re.findall(metadata.DATE_PATTERN, text),
+        "emails": re.findall(metadata.EMAIL_PATTERN, text),
+        "phones": re.findall(metadata.PHONE_PATTERN, text),
+        "urls": re.findall(metadata.URL_PATTERN, text),
+    }
+    result["keywords"] = [
+        kw for kw in metadata.DEPARTMENT_KEYWORDS
+        if re.search(rf"\b{kw}\b", text, re.IGNORECASE)
+    ]
+    return result
+
+
+def single_pass(text: str) -> list:
+    return list(metadata.scan(text))
+
+
+def timed(fn, text: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    for size_mb in args.size_mb:
+        text = sample_text(int(size_mb * 1024 * 1024))
+        legacy = timed(legacy_regex, text)
+        scanned = timed(single_pass, text)
+        print(f"{size_mb} MB: legacy {legacy * 1000:8.1f} ms | single pass {scanned * 1000:8.1f} ms ({legacy / scanned:.1f}x)")
+
+        kinds = {}
+        for match in metadata.scan(text):
+            kinds[match.kind] = kinds.get(match.kind, 0) + 1
+        old = legacy_regex(text)
+        print(f"  single pass matches: {kinds}")
+        print(f"  legacy matches     : { {k: len(v) for k, v in old.items()} }")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--size-mb", type=float, nargs="+", default=[1, 4])
+    main(arg_parser.parse_args())
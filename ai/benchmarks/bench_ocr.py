@@ -0,0 +1,76 @@
+"""
+Pages per second of the threaded OCR path (one shared EasyOCR reader)
+against the process pool (one reader per process, shared-memory pages).
+Uses synthetic text pages unless --pdf is given.
+
+    python benchmarks/bench_ocr.py --pages 16 --processes 2 4
+    python benchmarks/bench_ocr.py --pdf scan.pdf
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import easyocr
+import numpy as np
+from PIL import Image, ImageDraw
+
+from pipeline import ocr
+from pipeline.ocr_pool import OCRPool
+
+LINES = [
+    "KOCHI METRO RAIL LIMITED",
+    "Tender No. KMRL/PROCITENDER/2024-25/118",
+    "Supply of escalator spares for Aluva depot",
+    "Invoice INV-2231 dated 12/03/2024 for Rs. 4,50,000",
+    "Maintenance schedule revised by the Engineering wing",
+]
+
+
+def synthetic_pages(count: int):
+    pages = []
+    for n in range(count):
+        image = Image.new("RGB", (1240, 1754), "white")
+        draw = ImageDraw.Draw(image)
+        for i in range(30):
+            draw.text((80, 80 + i * 52), f"{n}.{i} {LINES[(n + i) % len(LINES)]}", fill="black")
+        pages.append(np.array(image))
+    return pages
+
+
+def pdf_pages(path: str):
+    return [array for _, array in ocr.iter_pdf_pages(path)]
+
+
+def run(reader, pages, workers: int) -> float:
+    start = time.perf_counter()
+    texts = ocr.ocr_pages(enumerate(pages), workers=workers, reader=reader)
+    elapsed = time.perf_counter() - start
+    assert len(texts) == len(pages)
+    return len(pages) / elapsed
+
+
+def main(args):
+    pages = pdf_pages(args.pdf) if args.pdf else synthetic_pages(args.pages)
+    print(f"{len(pages)} pages, {os.cpu_count()} cpus")
+
+    threaded = run(easyocr.Reader(["en"], gpu=False), pages, args.threads)
+    print(f"threads x{args.threads:<2} shared reader : {threaded:6.2f} pages/s")
+
+    for processes in args.processes:
+        pool = OCRPool(workers=processes, torch_threads=max(1, (os.cpu_count() or 1) // processes))
+        pool.warm_up()
+        rate = run(pool, pages, processes)
+        pool.shutdown()
+        print(f"processes x{processes:<2} own readers: {rate:6.2f} pages/s ({rate / threaded:.1f}x)")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pdf")
+    arg_parser.add_argument("--pages", type=int, default=16)
+    arg_parser.add_argument("--threads", type=int, default=4)
+    arg_parser.add_argument("--processes", type=int, nargs="+", default=[2, 4])
+    main(arg_parser.parse_args())
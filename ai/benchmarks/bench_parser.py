@@ -0,0 +1,91 @@
+"""
+Compare PDF text extraction engines over sample PDFs: pdfplumber,
+PyMuPDF (with pdfplumber for table-heavy pages) and PyMuPDF split across
+page ranges in subprocesses. Each run happens in a fresh process so the
+peak RSS of one engine does not hide another's.
+
+    python benchmarks/bench_parser.py                       # server/uploads/*.pdf
+    python benchmarks/bench_parser.py manual.pdf --repeat 3
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "..", "src"))
+
+DEFAULT_PDFS = os.path.join(ROOT, "..", "..", "server", "uploads", "*.pdf")
+RUNS = [
+    ("pdfplumber", "pdfplumber", False),
+    ("pymupdf", "pymupdf", False),
+    ("pymupdf-parallel", "pymupdf", True),
+]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_engine(path: str, engine: str, parallel: bool, repeat: int, queue) -> None:
+    from pipeline import parser
+
+    baseline = peak_rss_mb()
+    # Untimed first run starts the parse pool and warms the page cache
+    parser.analyze_pdf_pages(path, engine=engine, parallel=parallel)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = parser.analyze_pdf_pages(path, engine=engine, parallel=parallel)
+        best = min(best, time.perf_counter() - start)
+    parser.shutdown_parse_pool()
+    queue.put(
+        {
+            "pages": len(pages),
+            "seconds": best,
+            "chars": sum(len(p.text) for p in pages),
+            "ocr_pages": sum(p.needs_ocr for p in pages),
+            # Subprocess workers of the parallel run are not included
+            "peak_mb": peak_rss_mb() - baseline,
+        }
+    )
+
+
+def measure(path: str, engine: str, parallel: bool, repeat: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=run_engine, args=(path, engine, parallel, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(args):
+    paths = args.pdfs or sorted(glob.glob(DEFAULT_PDFS))
+    totals = {name: [0, 0.0] for name, _, _ in RUNS}
+    for path in paths:
+        print(os.path.basename(path))
+        for name, engine, parallel in RUNS:
+            r = measure(path, engine, parallel, args.repeat)
+            totals[name][0] += r["pages"]
+            totals[name][1] += r["seconds"]
+            print(
+                f"  {name:>16}: {r['pages']:4d} pages {r['seconds'] * 1000:9.1f} ms "
+                f"({r['pages'] / r['seconds']:8.1f} pages/s) | {r['chars']:8d} chars, "
+                f"{r['ocr_pages']} need OCR | peak +{r['peak_mb']:.0f} MB"
+            )
+    print("total")
+    for name, (pages, seconds) in totals.items():
+        if seconds:
+            print(f"  {name:>16}: {pages / seconds:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("pdfs", nargs="*")
+    arg_parser.add_argument("--repeat", type=int, default=1)
+    main(arg_parser.parse_args())
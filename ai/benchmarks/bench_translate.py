@@ -0,0 +1,64 @@
+"""
+Compare whole-document vs chunked concurrent translation against the local
+fake LLM endpoint, whose latency grows with the length of the text.
+
+    python benchmarks/bench_translate.py --paragraphs 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_llm_server import start_server
+
+
+def sample_text(paragraphs: int) -> str:
+    return "\n\n".join(
+        f"ഖണ്ഡിക {i}. കൊച്ചി മെട്രോ റെയിൽ ലിമിറ്റഡ് അറ്റകുറ്റപ്പണി ഷെഡ്യൂൾ പുതുക്കി. "
+        f"ടെൻഡർ രേഖകൾ സമർപ്പിക്കേണ്ട അവസാന തീയതി നീട്ടി."
+        for i in range(paragraphs)
+    )
+
+
+async def run(translate, text: str, chunk_tokens: int, concurrency: int) -> float:
+    translate.CHUNK_TOKENS = chunk_tokens
+    translate.CONCURRENCY = concurrency
+    translate.TRANSLATION_CACHE.clear()
+    start = time.perf_counter()
+    result = await translate.translate_to_english(text, source_lang="ml")
+    elapsed = time.perf_counter() - start
+    # Every paragraph must come back exactly once and in order
+    positions = [result.find(f"ഖണ്ഡിക {i}.") for i in range(text.count("\n\n") + 1)]
+    assert all(p >= 0 for p in positions) and positions == sorted(positions), "chunks out of order"
+    return elapsed
+
+
+async def main(args):
+    server, url = start_server(latency=args.latency, latency_per_char=args.latency_per_char)
+    os.environ["LLM_BASE_URL"] = url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    from pipeline import llm_client, translate
+
+    text = sample_text(args.paragraphs)
+    print(f"Document: {len(text)} chars, {args.paragraphs} paragraphs")
+    single = await run(translate, text, chunk_tokens=10**9, concurrency=1)
+    print(f"single request           : {single:.2f}s")
+    for concurrency in args.concurrency:
+        elapsed = await run(translate, text, args.chunk_tokens, concurrency)
+        print(f"chunked, concurrency={concurrency:<3}: {elapsed:.2f}s ({single / elapsed:.1f}x)")
+
+    await llm_client.close_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--paragraphs", type=int, default=200)
+    arg_parser.add_argument("--chunk-tokens", type=int, default=500)
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    arg_parser.add_argument("--latency-per-char", type=float, default=0.0001)
+    asyncio.run(main(arg_parser.parse_args()))
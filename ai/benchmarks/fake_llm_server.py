@@ -0,0 +1,103 @@
+"""
+Minimal OpenAI-compatible chat completions server for local testing.
+
+Echoes the text after the first line of the last user message, prefixed with
+"[<model>] ", after a configurable delay; a fraction of requests (or the
+first N) can be made to fail with 503 to exercise retries. server.requests
+counts the completion requests received.
+
+    python benchmarks/fake_llm_server.py --port 8081 --latency 0.2
+    LLM_BASE_URL=http://127.0.0.1:8081/v1 GROQ_API_KEY=fake uvicorn api:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(
+    latency: float, latency_per_char: float, fail_rate: float, fail_first: int = 0, retry_after: float = None
+):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with self.server.lock:
+                self.server.requests += 1
+                count = self.server.requests
+            if count <= fail_first or random.random() < fail_rate:
+                self.send_response(503)
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            prompt = body["messages"][-1]["content"]
+            text = prompt.split("\n", 1)[1] if "\n" in prompt else prompt
+            time.sleep(latency + latency_per_char * len(text))
+
+            content = f"[{body.get('model', 'fake')}] {text}"
+            response = {
+                "id": "fake",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (len(prompt) + len(content)) // 4,
+                },
+            }
+            data = json.dumps(response).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(
+    port: int = 0,
+    latency: float = 0.0,
+    latency_per_char: float = 0.0,
+    fail_rate: float = 0.0,
+    fail_first: int = 0,
+    retry_after: float = None,
+):
+    """Start the server in a daemon thread and return (server, base_url)."""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(latency, latency_per_char, fail_rate, fail_first, retry_after)
+    )
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--port", type=int, default=8081)
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--latency-per-char", type=float, default=0.0)
+    arg_parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    server, url = start_server(args.port, args.latency, args.latency_per_char, args.fail_rate)
+    print(f"Fake LLM endpoint listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
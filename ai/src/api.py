@@ -1,116 +1,467 @@
 from fastapi import Body
-from fastapi import FastAPI, UploadFile
-from pipeline import parser, ocr, translate, classify, metadata, embeddings, summarize
-from utils.langdetect_utils import detect_language
+from fastapi import Depends, FastAPI, Form, HTTPException, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import AsyncExitStack
+from typing import List, Optional
+from pipeline import parser, llm_client, vector_store
+from pipeline import job_worker, models, query_cache
+from pipeline.runner import DocumentPipeline
+from utils.executor import AdmissionError, StageExecutor
+from utils import metrics
+from utils.job_queue import CANCELLED, DONE, FINISHED, LANES
+from utils.uploads import SavedUpload, UploadTooLarge, saved_upload
+import asyncio
+import json
 import logging
+import os
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# Shared worker pools for the blocking pipeline stages
+executor = StageExecutor()
 
-@app.post("/process")
-async def process_file(file: UploadFile):
-    logger.info(f"Received file: {file.filename}")
+# Extraction, translation, the stage graph and the result cache
+document_pipeline = DocumentPipeline(executor)
+embedding_batcher = document_pipeline.batcher
+pipeline_graph = document_pipeline.graph
+
+
+# Durable /jobs queue; worker processes are started with the app
+job_queue = job_worker.open_queue() if models.serves("jobs") else None
+job_processes = []
+
+JOBS_SUBMITTED = metrics.counter("jobs_submitted_total", "Jobs submitted", ["lane"])
+JOB_QUEUE_DEPTH = metrics.gauge("job_queue_depth", "Jobs per lane and status", ["lane", "status"])
+JOBS_INDEXED = metrics.counter("jobs_indexed_total", "Finished job vectors added to the index")
+
+# Request-level metrics; per-stage timings live in pipeline.graph
+HTTP_INFLIGHT = metrics.gauge("http_requests_inflight", "HTTP requests being handled")
+HTTP_LATENCY = metrics.histogram(
+    "http_request_seconds", "Time to response headers by route", ["route", "method", "status"]
+)
+DOCUMENTS_RUNNING = metrics.gauge("pipeline_documents_running", "Documents holding a pipeline slot")
+DOCUMENTS_WAITING = metrics.gauge("pipeline_documents_waiting", "Documents waiting for a pipeline slot")
+VECTORS_INDEXED = metrics.gauge("vector_store_documents", "Documents in the local vector index")
+
+
+def collect_metrics():
+    DOCUMENTS_RUNNING.set(executor.running)
+    DOCUMENTS_WAITING.set(executor.waiting)
+    VECTORS_INDEXED.set(len(vector_store.get_store()))
+    if job_queue is not None:
+        _job_depth()
+
+
+metrics.add_collector(collect_metrics)
+
+
+# Models this replica loads in the background at startup; /health is not
+# ready until they are
+preload_models = models.preload_list()
 
-    # Save uploaded file temporarily
-    file_path = f"/tmp/{file.filename}"
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
-
-    # --- Text Extraction ---
-    text = ""
-    if file.filename.endswith(".pdf"):  # type: ignore
-        logger.info("Extracting text from PDF")
-        text = parser.extract_text_pdf(file_path)
-        if not text.strip():  # fallback to OCR for scanned PDF
-            logger.info("PDF text extraction empty, falling back to OCR")
-            text = ocr.extract_text_from_file(file_path)  # type: ignore
-    elif file.filename.endswith(".docx"):  # type: ignore
-        logger.info("Extracting text from DOCX")
-        text = parser.extract_text_docx(file_path)
-    else:
-        logger.info("Extracting text using OCR from image")
-        text = ocr.extract_text_from_file(file_path)  # type: ignore
-
-    # --- Check if any text was extracted ---
-    if not text.strip():
-        logger.info("No text could be extracted from this document.")
-        return {
-            "file_name": file.filename,
-            "error": "No text could be extracted from this document.",
-        }
-
-    # --- Language Detection ---
-    detected_lang = detect_language(text)
-    logger.info(f"Detected language: {detected_lang}")
-
-    # --- Translation (if not English) ---
-    translated_text = text
-    if detected_lang != "en" and detected_lang != "unknown":
-        logger.info("Translating text to English")
-        translated_text = translate.translate_to_english(text)
-    else:
-        logger.info("No translation needed")
-
-    # --- Classification ---
-    logger.info("Classifying document")
-    doc_class = classify.classify_doc(translated_text)
-
-    # --- Metadata / NER Extraction ---
-    logger.info("Extracting metadata")
-    meta = metadata.extract_metadata(translated_text)
-
-    # --- Embeddings ---
-    logger.info("Generating embeddings")
-    embedding_vector = embeddings.embed_text([translated_text])[0].tolist()
-
-    # --- Summarization ---
-    logger.info("Summarizing text")
-    
-    # Generate English summary
-    if detected_lang != "en" and detected_lang != "unknown":
-        translated_for_summary = translate.translate_to_english(text)
-    else:
-        translated_for_summary = text
-    
-    summary_en = summarize.summarize_text(translated_for_summary)
-    
-    # Generate Malayalam summary by translating English summary
+
+def require(feature: str):
+    """Dependency that hides endpoints outside this replica's AI_ROLE."""
+
+    def check():
+        if not models.serves(feature):
+            raise HTTPException(status_code=404, detail=f"Not served by '{models.AI_ROLE}' replicas")
+
+    return Depends(check)
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    with HTTP_INFLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route templates, not raw paths, so job and document ids stay out of labels
+            route = request.scope.get("route")
+            HTTP_LATENCY.observe(
+                time.perf_counter() - started,
+                route=getattr(route, "path", "unmatched"),
+                method=request.method,
+                status=status,
+            )
+
+
+@app.on_event("startup")
+async def preload():
+    logger.info(f"Starting as '{models.AI_ROLE}' replica, preloading {preload_models}")
+    loop = asyncio.get_running_loop()
+    # Off the event loop so the app accepts requests (and health checks) meanwhile
+    loop.run_in_executor(None, models.REGISTRY.preload, preload_models)
+
+
+@app.on_event("startup")
+async def warm_query_cache():
+    if not models.serves("search"):
+        return
     try:
-        logger.info("Translating English summary to Malayalam")
-        summary_ml = translate.translate_to_malayalam(summary_en)
+        await query_cache.warm_up(embedding_batcher, query_cache.warmup_queries())
     except Exception as e:
-        logger.error(f"Failed to translate summary to Malayalam: {e}")
-        summary_ml = None
+        logger.error(f"Query cache warm-up failed: {e}")
+
+
+@app.on_event("startup")
+async def start_vector_flush():
+    asyncio.create_task(flush_vector_store())
+
+
+async def flush_vector_store():
+    """Batched index writes reach disk within VECTOR_SAVE_SECONDS even when idle."""
+    store = vector_store.get_store()
+    while True:
+        await asyncio.sleep(vector_store.VECTOR_SAVE_SECONDS)
+        try:
+            await executor.run("index", store.flush)
+        except Exception as e:
+            logger.error(f"Saving the vector index failed: {e}")
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    if job_queue is None:
+        return
+    job_processes.extend(job_worker.start_workers())
+    logger.info(f"Started {len(job_processes)} job worker processes")
+    asyncio.create_task(index_finished_jobs())
+
+
+async def index_finished_jobs():
+    """Workers cannot write the vector index; add their documents here."""
+    store = vector_store.get_store()
+    while True:
+        try:
+            for job_id, result in await executor.run("jobs", job_queue.unindexed):
+                vector = result.get("embedding_vector")
+                if vector and not store.read_only:
+                    await executor.run("index", store.upsert, result["document_id"], vector)
+                    JOBS_INDEXED.inc()
+                await executor.run("jobs", job_queue.mark_indexed, job_id)
+        except Exception as e:
+            logger.error(f"Indexing finished jobs failed: {e}")
+        await asyncio.sleep(job_worker.JOB_POLL_SECONDS)
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    job_worker.stop_workers(job_processes)
+    await document_pipeline.close()
+    models.REGISTRY.close()
+    parser.shutdown_parse_pool()
+    await llm_client.close_client()
+    vector_store.get_store().save()
+    if job_queue is not None:
+        job_queue.close()
+
+
+@app.get("/health")
+async def health():
+    ready = models.REGISTRY.ready(preload_models)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "role": models.AI_ROLE, "models": models.REGISTRY.status()},
+    )
+
+
+@app.post("/process", dependencies=[require("process")])
+async def process_file(file: UploadFile, document_id: Optional[str] = Form(None), timings: bool = False):
+    """?timings=true adds the seconds spent in each pipeline step to the response."""
+    logger.info(f"Received file: {file.filename}")
+    try:
+        async with saved_upload(file) as upload:
+            return await _process_upload(upload, document_id, {} if timings else None)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _process_upload(upload: SavedUpload, document_id: Optional[str], timings: Optional[dict] = None):
+    # Vectors are indexed under the caller's id, or the content hash by default
+    document_id = document_id or upload.sha256
+
+    # Repeat uploads are answered from the result cache without admission
+    started = time.perf_counter()
+    cached = await document_pipeline.cached(upload.sha256, upload.filename, document_id)
+    if cached is not None:
+        if timings is not None:
+            cached["timings"] = {"result_cache": round(time.perf_counter() - started, 4)}
+        return cached
+
+    try:
+        async with executor.admit():
+            result = await document_pipeline.process(upload, document_id, timings=timings)
+    except AdmissionError as e:
+        logger.warning(f"Rejecting {upload.filename}: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+    await document_pipeline.store(upload.sha256, result)
+    if timings is not None:
+        result = {**result, "timings": timings}
+    return result
 
-    # --- Return structured response ---
+
+def _stream_event(event: str, data, sse: bool) -> str:
+    data = jsonable_encoder(data)
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+@app.post("/process/stream", dependencies=[require("process")])
+async def process_file_stream(
+    request: Request, file: UploadFile, document_id: Optional[str] = Form(None), format: Optional[str] = None
+):
+    """
+    /process with progressive output: one event per result field as soon as
+    it is ready (original_text, detected_language, translated_text, then each
+    stage), then "done". NDJSON by default; Server-Sent Events with
+    ?format=sse or Accept: text/event-stream.
+    """
+    logger.info(f"Received file for streaming: {file.filename}")
+    sse = format == "sse" or "text/event-stream" in request.headers.get("accept", "")
+
+    # The upload and the pipeline slot must outlive this handler, so they are
+    # held on an exit stack that the stream closes; errors before the first
+    # byte still get a proper status code
+    stack = AsyncExitStack()
+    try:
+        upload = await stack.enter_async_context(saved_upload(file))
+        document_id = document_id or upload.sha256
+        cached = await document_pipeline.cached(upload.sha256, upload.filename, document_id)
+        if cached is None:
+            await stack.enter_async_context(executor.admit())
+    except UploadTooLarge as e:
+        await stack.aclose()
+        raise HTTPException(status_code=413, detail=str(e))
+    except AdmissionError as e:
+        await stack.aclose()
+        logger.warning(f"Rejecting {file.filename}: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    async def events():
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def run():
+            try:
+                result = await document_pipeline.process(
+                    upload, document_id, on_event=lambda key, value: queue.put_nowait((key, value))
+                )
+                await document_pipeline.store(upload.sha256, result)
+                if "error" in result:
+                    queue.put_nowait(("error", {"detail": result["error"]}))
+            except Exception as e:
+                logger.error(f"Streaming pipeline failed for {upload.filename}: {e}")
+                queue.put_nowait(("error", {"detail": str(e)}))
+            finally:
+                queue.put_nowait(done)
+
+        async with stack:
+            yield _stream_event("start", {"file_name": upload.filename, "document_id": document_id}, sse)
+            if cached is not None:
+                for key, value in cached.items():
+                    if key not in ("file_name", "document_id"):
+                        yield _stream_event(key, value, sse)
+                yield _stream_event("done", {"cached": True}, sse)
+                return
+            task = asyncio.create_task(run())
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        break
+                    yield _stream_event(*item, sse)
+                yield _stream_event("done", {"cached": False}, sse)
+            finally:
+                # Client went away: stop the remaining stages
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/extract", dependencies=[require("extract")])
+async def extract_file(file: UploadFile):
+    """Text extraction (parsing/OCR) only, for OCR replicas."""
+    logger.info(f"Received file for extraction: {file.filename}")
+    try:
+        async with saved_upload(file) as upload, executor.admit():
+            text = await document_pipeline.extract_text(upload.filename, upload.path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except AdmissionError as e:
+        logger.warning(f"Rejecting {file.filename}: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    return {"file_name": file.filename, "text": text}
+
+
+def _job_depth() -> dict:
+    depth = job_queue.depth()
+    for lane, statuses in depth.items():
+        for status in ("queued", "running", *FINISHED):
+            JOB_QUEUE_DEPTH.set(statuses.get(status, 0), lane=lane, status=status)
+    return depth
+
+
+@app.post("/jobs", status_code=202, dependencies=[require("jobs")])
+async def submit_job(
+    file: UploadFile, document_id: Optional[str] = Form(None), priority: str = Form("normal")
+):
+    """Queue a document for /process-style processing and return at once."""
+    if priority not in LANES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {list(LANES)}")
+    try:
+        async with saved_upload(file, directory=job_worker.JOB_DIR) as upload:
+            # Keep the upload past this request; the worker deletes it when done
+            path = os.path.join(job_worker.JOB_DIR, f"job-{os.path.basename(upload.path)}")
+            os.replace(upload.path, path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    payload = {
+        "file_name": upload.filename,
+        "path": path,
+        "size": upload.size,
+        "sha256": upload.sha256,
+        "document_id": document_id or upload.sha256,
+    }
+    job_id = await executor.run(
+        "jobs", job_queue.submit, payload, priority, job_worker.JOB_MAX_ATTEMPTS
+    )
+    JOBS_SUBMITTED.inc(lane=priority)
+    logger.info(f"Queued job {job_id} for {upload.filename} ({priority})")
+    return {"job_id": job_id, "status": "queued", "lane": priority}
+
+
+@app.get("/jobs", dependencies=[require("jobs")])
+async def job_queue_depth():
+    return {"lanes": await executor.run("jobs", _job_depth), "workers": sum(p.is_alive() for p in job_processes)}
+
+
+async def _job_or_404(job_id: str) -> dict:
+    job = await executor.run("jobs", job_queue.status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+@app.get("/jobs/{job_id}", dependencies=[require("jobs")])
+async def job_status(job_id: str):
+    return await _job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/result", dependencies=[require("jobs")])
+async def job_result(job_id: str):
+    job = await _job_or_404(job_id)
+    if job["status"] == DONE:
+        result = await executor.run("jobs", job_queue.result, job_id)
+        return {**result, "vector_indexed": job["indexed"]}
+    if job["status"] in FINISHED:
+        raise HTTPException(status_code=409, detail={"status": job["status"], "error": job["error"]})
+    return JSONResponse(status_code=202, content=job)
+
+
+@app.delete("/jobs/{job_id}", dependencies=[require("jobs")])
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or ask its worker to stop a running one."""
+    job = await _job_or_404(job_id)
+    status = await executor.run("jobs", job_queue.cancel, job_id)
+    if status == CANCELLED and job["status"] != CANCELLED:
+        # Never claimed, so no worker will clean up its upload
+        job_worker.discard_upload(await executor.run("jobs", job_queue.payload, job_id))
+    return {"job_id": job_id, "status": status}
+
+
+@app.get("/stats")
+async def stats():
     return {
-        "file_name": file.filename,
-        "detected_language": detected_lang,
-        "original_text": text,
-        "translated_text": translated_text,
-        "classification": doc_class,
-        "metadata": meta,
-        "embedding_vector": embedding_vector,
-        "summary_en": summary_en,
-        "summary_ml": summary_ml,
+        "executor": executor.stats(),
+        "vector_store": vector_store.get_store().stats(),
+        "query_cache": query_cache.QUERY_CACHE.stats(),
+        "result_cache": (
+            document_pipeline.results_cache.stats() if document_pipeline.results_cache is not None else None
+        ),
+        "models": models.REGISTRY.status(),
+        "jobs": await executor.run("jobs", _job_depth) if job_queue is not None else None,
+        "metrics": await run_in_threadpool(metrics.REGISTRY.snapshot),
     }
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    # Collectors query SQLite (job queue depth); keep them off the event loop
+    return Response(await run_in_threadpool(metrics.REGISTRY.render), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/pipeline/stages")
+async def pipeline_stages():
+    return {"stages": pipeline_graph.describe()}
+
+
 # RAG search endpoint
 from pydantic import BaseModel # type: ignore
 
 class RAGSearchRequest(BaseModel):
     query: str
+    top_k: int = 5
 
 
-@app.post("/rag_search")
+@app.post("/rag_search", dependencies=[require("search")])
 async def rag_search(request: RAGSearchRequest):
     logger.info(f"Received RAG search query: {request.query}")
-    embedding_vector = embeddings.embed_text([request.query])[0].tolist()
+    embedding_vector = (await query_cache.embed_query(request.query, embedding_batcher)).tolist()
+    # Top-k documents from the local index; queries themselves are never indexed
+    results = await executor.run(
+        "index", vector_store.get_store().search, embedding_vector, request.top_k
+    )
     return {
         "query": request.query,
         "embedding_vector": embedding_vector,
-    }
\ No newline at end of file
+        "results": results,
+    }
+
+
+class VectorUpsertRequest(BaseModel):
+    vector: List[float]
+
+
+@app.put("/vectors/{document_id}", dependencies=[require("vectors")])
+async def upsert_vector(document_id: str, request: VectorUpsertRequest):
+    store = vector_store.get_store()
+    if store.read_only:
+        raise HTTPException(status_code=409, detail="Vector store is read-only on this replica")
+    if len(request.vector) != store.dim:
+        raise HTTPException(status_code=400, detail=f"Expected a {store.dim}-dimensional vector")
+    await executor.run("index", store.upsert, document_id, request.vector)
+    return {"document_id": document_id, "indexed": True}
+
+
+@app.delete("/vectors/{document_id}", dependencies=[require("vectors")])
+async def delete_vector(document_id: str):
+    store = vector_store.get_store()
+    if store.read_only:
+        raise HTTPException(status_code=409, detail="Vector store is read-only on this replica")
+    removed = await executor.run("index", store.remove, document_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Document not indexed")
+    return {"document_id": document_id, "deleted": True}
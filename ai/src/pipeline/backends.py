@@ -0,0 +1,116 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Inference backend for the transformer models:
+#   "torch"     - the original PyTorch models (default)
+#   "onnx"      - ONNX Runtime on an exported graph
+#   "onnx-int8" - ONNX Runtime on a dynamically int8-quantized export
+# CLASSIFY_BACKEND / EMBED_BACKEND override MODEL_BACKEND per model. Exports
+# are written once under ONNX_MODEL_DIR and reused on the next start. When
+# optimum/onnxruntime are not installed the torch path is used instead.
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+CLASSIFY_BACKEND = os.getenv("CLASSIFY_BACKEND", MODEL_BACKEND)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", MODEL_BACKEND)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+# Instruction set the int8 kernels are tuned for: avx2, avx512, avx512_vnni or arm64
+ONNX_QUANT_ARCH = os.getenv("ONNX_QUANT_ARCH", "avx2")
+# 0 lets ONNX Runtime pick; set it when several workers share a node
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def _check(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}', expected one of {BACKENDS}")
+    return backend
+
+
+def _export_dir(model_name: str, backend: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "--"), backend)
+
+
+def _session_options():
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_THREADS:
+        options.intra_op_num_threads = ONNX_THREADS
+    return options
+
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    factory = getattr(AutoQuantizationConfig, ONNX_QUANT_ARCH)
+    return factory(is_static=False, per_channel=False)
+
+
+def _load_ort_classifier(model_name: str, backend: str):
+    """Export (once) and load an ONNX Runtime sequence classification model."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from transformers import AutoTokenizer
+
+    path = _export_dir(model_name, backend)
+    file_name = QUANTIZED_FILE if backend == "onnx-int8" else "model.onnx"
+    if not os.path.exists(os.path.join(path, file_name)):
+        logger.info(f"Exporting {model_name} to ONNX ({backend}) in {path}")
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        model.save_pretrained(path)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(path)
+        if backend == "onnx-int8":
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(save_dir=path, quantization_config=_quantization_config())
+
+    model = ORTModelForSequenceClassification.from_pretrained(
+        path, file_name=file_name, session_options=_session_options()
+    )
+    return model, AutoTokenizer.from_pretrained(path)
+
+
+def load_zero_shot(model_name: str, backend: str = CLASSIFY_BACKEND):
+    """Zero-shot classification pipeline on the requested backend."""
+    from transformers import pipeline
+
+    if _check(backend) != "torch":
+        try:
+            model, tokenizer = _load_ort_classifier(model_name, backend)
+            logger.info(f"Loaded {model_name} with ONNX Runtime ({backend})")
+            return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+        except ImportError as e:
+            logger.warning(f"ONNX backend unavailable for {model_name} ({e}); using torch")
+    return pipeline("zero-shot-classification", model=model_name)
+
+
+def load_sentence_transformer(model_name: str, backend: str = EMBED_BACKEND):
+    """SentenceTransformer on the requested backend (needs sentence-transformers>=3.2 for ONNX)."""
+    from sentence_transformers import SentenceTransformer
+
+    if _check(backend) == "torch":
+        return SentenceTransformer(model_name)
+
+    try:
+        import onnxruntime  # noqa: F401
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+    except ImportError as e:
+        logger.warning(f"ONNX backend unavailable for {model_name} ({e}); using torch")
+        return SentenceTransformer(model_name)
+
+    path = _export_dir(model_name, backend)
+    if not os.path.exists(path):
+        logger.info(f"Exporting {model_name} to ONNX ({backend}) in {path}")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(path)
+        if backend == "onnx-int8":
+            export_dynamic_quantized_onnx_model(model, ONNX_QUANT_ARCH, path)
+
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if backend == "onnx-int8":
+        model_kwargs["file_name"] = f"onnx/model_qint8_{ONNX_QUANT_ARCH}.onnx"
+    model = SentenceTransformer(path, backend="onnx", model_kwargs=model_kwargs)
+    logger.info(f"Loaded {model_name} with ONNX Runtime ({backend})")
+    return model
@@ -0,0 +1,139 @@
+import os
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+import numpy as np
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Concurrent encode calls are collected for up to EMBED_BATCH_WAIT_MS or until
+# EMBED_MAX_BATCH texts are pending, then encoded together in one model call.
+MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+BATCH_WORKERS = int(os.getenv("EMBED_BATCH_WORKERS", "1"))
+
+BATCH_TEXTS = metrics.histogram(
+    "embedding_batch_size", "Texts per encode batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+BATCH_FILL = metrics.histogram(
+    "embedding_batch_fill_ratio", "Batch size relative to the maximum", buckets=(0.1, 0.25, 0.5, 0.75, 1.0)
+)
+QUEUE_LATENCY = metrics.histogram("embedding_queue_seconds", "Time a request waits before its batch starts")
+ENCODE_LATENCY = metrics.histogram("embedding_encode_seconds", "Model time per batch")
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent encode calls in front of an encode function
+    (embeddings.embed_text), running each batch on the stage executor.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable,
+        executor,
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+        workers: int = BATCH_WORKERS,
+    ):
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._carry: Optional[_Request] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, sharing model calls with other concurrent callers."""
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        # Large inputs are split so short queries can share their batches
+        futures = []
+        for i in range(0, len(texts), self.max_batch):
+            future = loop.create_future()
+            self._queue.put_nowait(_Request(texts[i:i + self.max_batch], future, time.perf_counter()))
+            futures.append(future)
+        parts = await asyncio.gather(*futures)
+        return parts[0] if len(parts) == 1 else np.vstack(parts)
+
+    async def _collect(self) -> List[_Request]:
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                # Take whatever is already queued without waiting
+                request = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if size + len(request.texts) > self.max_batch:
+                # Does not fit; it leads the next batch
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            texts = [t for request in batch for t in request.texts]
+            for request in batch:
+                QUEUE_LATENCY.observe(started - request.enqueued_at)
+            BATCH_TEXTS.observe(len(texts))
+            BATCH_FILL.observe(len(texts) / self.max_batch)
+
+            try:
+                vectors = await self.executor.run("embeddings", self.encode_fn, texts)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            ENCODE_LATENCY.observe(time.perf_counter() - started)
+
+            offset = 0
+            for request in batch:
+                n = len(request.texts)
+                if not request.future.done():
+                    request.future.set_result(vectors[offset:offset + n])
+                offset += n
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
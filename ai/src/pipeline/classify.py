@@ -1,376 +1,160 @@
-from transformers import pipeline
 import numpy as np
+import os
+import asyncio
+import hashlib
 import logging
+from pipeline import backends, models
+from pipeline.departments import KMRL_DEPARTMENTS, DEPT_KEYWORDS
+from pipeline.keyword_matcher import KeywordMatcher
+from utils.cache import TTLCache
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize zero-shot classifier once
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+# Zero-shot classifier, loaded once on first use
+# (torch, or ONNX Runtime with CLASSIFY_BACKEND=onnx|onnx-int8)
+models.register("zero_shot", lambda: backends.load_zero_shot("facebook/bart-large-mnli"))
 
-# KMRL Departments
-KMRL_DEPARTMENTS = [
-    "Operations & Maintenance",
-    "Engineering & Infrastructure",
-    "Electrical & Mechanical",
-    "Finance & Accounts",
-    "Human Resources",
-    "Legal & Compliance",
-    "Procurement & Contracts",
-    "Corporate Communications",
-    "Business Development",
-    "Vigilance & Security",
-    "Information Technology & Systems",
-    "Planning & Development",
-    "Environment & Sustainability",
-    "Customer Relations & Services",
-    "Project Management",
-]
+# Department labels and keyword lists live in pipeline.departments
+DEPT_MATCHER = KeywordMatcher(DEPT_KEYWORDS)
 
-# Department-specific keywords for high-precision overrides
-DEPT_KEYWORDS = {
-    "Operations & Maintenance": [
-        "maintenance",
-        "operations",
-        "operation",
-        "log",
-        "incident",
-        "breakdown",
-        "inspection",
-        "schedule",
-        "SOP",
-        "checklist",
-        "maintenance report",
-        "track",
-        "rolling stock",
-        "train operation",
-        "service disruption",
-        "O&M",
-    ],
-    "Engineering & Infrastructure": [
-        "design",
-        "infrastructure",
-        "construction",
-        "civil",
-        "structural",
-        "project plan",
-        "drawing",
-        "site",
-        "foundation",
-        "alignment",
-        "viaduct",
-        "pier",
-        "bridge",
-        "engineering",
-        "survey",
-        "estimate",
-        "project execution",
-        "work order",
-    ],
-    "Electrical & Mechanical": [
-        "electrical",
-        "mechanical",
-        "E&M",
-        "traction",
-        "substation",
-        "HVAC",
-        "lift",
-        "escalator",
-        "generator",
-        "power supply",
-        "cable",
-        "lighting",
-        "transformer",
-        "panel",
-        "motor",
-        "earthing",
-        "switchgear",
-        "UPS",
-    ],
-    "Finance & Accounts": [
-        "budget",
-        "financial",
-        "accounts",
-        "audit",
-        "invoice",
-        "expense",
-        "payment",
-        "bill",
-        "receipt",
-        "voucher",
-        "fund",
-        "reimbursement",
-        "salary",
-        "PF",
-        "tax",
-        "GST",
-        "ledger",
-        "balance sheet",
-        "financial statement",
-    ],
-    "Human Resources": [
-        "HR",
-        "human resource",
-        "policy",
-        "leave",
-        "training",
-        "employee",
-        "recruitment",
-        "appointment",
-        "promotion",
-        "transfer",
-        "memos",
-        "appraisal",
-        "attendance",
-        "payroll",
-        "disciplinary",
-        "grievance",
-        "welfare",
-        "retirement",
-        "resignation",
-    ],
-    "Legal & Compliance": [
-        "legal",
-        "court",
-        "compliance",
-        "RTI",
-        "license",
-        "statutory",
-        "regulation",
-        "notice",
-        "litigation",
-        "agreement",
-        "arbitration",
-        "law",
-        "affidavit",
-        "contract law",
-        "NOC",
-        "legal opinion",
-        "show cause",
-        "legal notice",
-    ],
-    "Procurement & Contracts": [
-        "tender",
-        "invoice",
-        "purchase order",
-        "BOQ",
-        "vendor",
-        "contract",
-        "procurement",
-        "quotation",
-        "bid",
-        "RFP",
-        "RFQ",
-        "e-tender",
-        "work order",
-        "agreement",
-        "bidder",
-        "purchase",
-        "supply",
-        "materials",
-        "PO",
-        "LC",
-    ],
-    "Corporate Communications": [
-        "press release",
-        "media",
-        "PR",
-        "newsletter",
-        "communication",
-        "event",
-        "publicity",
-        "advertisement",
-        "branding",
-        "social media",
-        "campaign",
-        "website",
-        "announcement",
-        "stakeholder",
-        "press",
-        "news",
-    ],
-    "Business Development": [
-        "business",
-        "development",
-        "revenue",
-        "PPP",
-        "partnership",
-        "expansion",
-        "commercial",
-        "opportunity",
-        "market",
-        "proposal",
-        "growth",
-        "collaboration",
-        "MoU",
-        "franchise",
-        "retail",
-        "advertising",
-        "lease",
-    ],
-    "Vigilance & Security": [
-        "security",
-        "vigilance",
-        "incident",
-        "CCTV",
-        "theft",
-        "loss",
-        "investigation",
-        "disciplinary",
-        "complaint",
-        "surveillance",
-        "patrolling",
-        "access control",
-        "guard",
-        "safety",
-        "breach",
-        "enquiry",
-        "vigilance report",
-    ],
-    "Information Technology & Systems": [
-        "IT",
-        "information technology",
-        "software",
-        "hardware",
-        "system",
-        "network",
-        "server",
-        "database",
-        "website",
-        "application",
-        "ERP",
-        "SAP",
-        "email",
-        "cybersecurity",
-        "IT support",
-        "ticket",
-        "LAN",
-        "WAN",
-        "data center",
-    ],
-    "Planning & Development": [
-        "planning",
-        "development",
-        "master plan",
-        "feasibility",
-        "DPR",
-        "survey",
-        "expansion",
-        "study",
-        "urban planning",
-        "proposal",
-        "project planning",
-        "land use",
-        "forecast",
-        "strategic",
-        "roadmap",
-    ],
-    "Environment & Sustainability": [
-        "environment",
-        "sustainability",
-        "EIA",
-        "green",
-        "pollution",
-        "waste",
-        "emission",
-        "CSR",
-        "tree",
-        "water",
-        "energy saving",
-        "solar",
-        "rainwater",
-        "environmental clearance",
-        "recycling",
-        "environmental impact",
-        "eco-friendly",
-    ],
-    "Customer Relations & Services": [
-        "customer",
-        "complaint",
-        "feedback",
-        "service",
-        "ticket",
-        "helpline",
-        "support",
-        "enquiry",
-        "lost and found",
-        "passenger",
-        "public",
-        "grievance",
-        "suggestion",
-        "customer care",
-        "fare",
-        "concession",
-        "service quality",
-    ],
-    "Project Management": [
-        "project",
-        "milestone",
-        "timeline",
-        "Gantt",
-        "progress",
-        "status",
-        "monitoring",
-        "update",
-        "coordination",
-        "review",
-        "resource",
-        "risk",
-        "project report",
-        "completion",
-        "deliverable",
-        "kickoff",
-        "PMP",
-    ],
-}
+# Score added to the department with the most keyword hits; others get a
+# share proportional to their hit count
+KEYWORD_BOOST = 0.2
 
+# Tiered classification: the document embedding is compared against one
+# prototype vector per department; zero-shot BART only runs when the best
+# department leads the runner-up by less than CLASSIFY_MARGIN. BART then sees
+# the CLASSIFY_CANDIDATES best departments and at most CLASSIFY_MAX_CHARS of
+# the chunks closest to them instead of the whole document.
+MARGIN = float(os.getenv("CLASSIFY_MARGIN", "0.05"))
+CANDIDATES = int(os.getenv("CLASSIFY_CANDIDATES", "5"))
+MAX_CHARS = int(os.getenv("CLASSIFY_MAX_CHARS", "2000"))
+CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "1024"))
 
-def classify_doc(text: str) -> dict:
+# Results keyed by text hash, so re-uploads skip both tiers
+CLASSIFY_CACHE = TTLCache(maxsize=CACHE_SIZE, name="classify")
+
+_prototypes = None
+_prototypes_lock = None
+
+
+def prototype_texts(department: str) -> list:
+    """Texts whose mean embedding represents a department."""
+    return [department, f"{department}: " + ", ".join(DEPT_KEYWORDS.get(department, []))]
+
+
+async def department_prototypes(batcher) -> np.ndarray:
+    """L2-normalized prototype matrix (departments x dim), encoded once per process."""
+    global _prototypes, _prototypes_lock
+    if _prototypes is not None:
+        return _prototypes
+    if _prototypes_lock is None:
+        _prototypes_lock = asyncio.Lock()
+    async with _prototypes_lock:
+        if _prototypes is None:
+            texts = [t for d in KMRL_DEPARTMENTS for t in prototype_texts(d)]
+            vectors = np.asarray(await batcher.encode(texts), dtype="float32")
+            vectors = vectors.reshape(len(KMRL_DEPARTMENTS), -1, vectors.shape[-1]).mean(axis=1)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            _prototypes = vectors
+            logger.info(f"Encoded {len(KMRL_DEPARTMENTS)} department prototypes")
+    return _prototypes
+
+
+def _boosted(scores: dict, keyword_hits: dict) -> dict:
+    """Add each department's share of KEYWORD_BOOST to its score."""
+    max_hits = max(keyword_hits.values(), default=0)
+    if not max_hits:
+        return scores
+    return {
+        label: score + KEYWORD_BOOST * keyword_hits.get(label, 0) / max_hits
+        for label, score in scores.items()
+    }
+
+
+def _informative_text(text: str, candidates: list, prototypes, chunk_vectors, offsets) -> str:
+    """
+    The chunks most similar to the candidate departments, in document order,
+    up to MAX_CHARS. Without chunk vectors the head of the document is used.
     """
-    Classify text into KMRL department with hybrid approach.
-    - First, check for high-confidence keywords
-    - Fallback to zero-shot classification for general cases
-    Returns primary department and full scores.
+    if len(text) <= MAX_CHARS:
+        return text
+    if chunk_vectors is None or offsets is None or prototypes is None:
+        return text[:MAX_CHARS]
+    rows = [KMRL_DEPARTMENTS.index(label) for label in candidates]
+    relevance = (np.asarray(chunk_vectors) @ prototypes[rows].T).max(axis=1)
+    picked, used = [], 0
+    for i in np.argsort(-relevance):
+        start, end = offsets[i]
+        if used and used + (end - start) > MAX_CHARS:
+            continue
+        picked.append((start, min(end, start + MAX_CHARS)))
+        used += picked[-1][1] - picked[-1][0]
+        if used >= MAX_CHARS:
+            break
+    return "\n".join(text[start:end] for start, end in sorted(picked))
+
+
+def classify_doc(text: str, document_vector=None, prototypes=None, chunk_vectors=None, offsets=None) -> dict:
+    """
+    Classify text into KMRL department with a tiered hybrid approach.
+    - Keyword hits boost each department in proportion to its hit count
+    - With a document vector and prototypes, cosine similarity decides when
+      the margin is clear ("embedding" tier)
+    - Otherwise zero-shot classification scores the candidate departments on
+      the most informative chunks ("zero_shot" tier)
+    Returns primary department, scores, keyword hits and the deciding tier.
     """
     if not text.strip():
         logger.info("Empty text received; returning Unknown.")
-        return {"primary_department": "Unknown", "labels": [], "scores": []}
-
-    text_lower = text.lower()
+        return {"primary_department": "Unknown", "labels": [], "scores": [], "tier": "empty"}
 
-    # Check for keyword matches first
-    matched_dept = None
-    for dept, keywords in DEPT_KEYWORDS.items():
-        if any(k.lower() in text_lower for k in keywords):
-            matched_dept = dept
-            logger.info(f"Keyword match found for department: {dept}")
-            break
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = CLASSIFY_CACHE.get(key)
+    if cached is not None:
+        return {**cached, "tier": "cache"}
 
-    # Run zero-shot classification once
-    result = classifier(text, candidate_labels=KMRL_DEPARTMENTS)
-    scores = result["scores"]
-    labels = result["labels"]
+    # Keyword hits for every department in a single scan of the text
+    keyword_hits = {d: n for d, n in DEPT_MATCHER.group_counts(text).items() if n}
+    if keyword_hits:
+        logger.info(f"Keyword hits: {keyword_hits}")
 
-    # If keyword matched, boost its score
-    if matched_dept:
-        if matched_dept in labels:
-            boost_index = labels.index(matched_dept)
-            scores[boost_index] += 0.2
-            logger.info(
-                f"Boosted score for {matched_dept} by 0.2 due to keyword match."
-            )
-        else:
-            logger.warning(
-                f"Matched department '{matched_dept}' not found in classifier labels."
-            )
+    candidates = KMRL_DEPARTMENTS
+    if document_vector is not None and prototypes is not None:
+        similarity = prototypes @ np.asarray(document_vector, dtype="float32")
+        scores = _boosted(dict(zip(KMRL_DEPARTMENTS, similarity.tolist())), keyword_hits)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        margin = scores[ranked[0]] - scores[ranked[1]]
+        if margin >= MARGIN:
+            logger.info(f"Primary department classified as: {ranked[0]} (embedding margin {margin:.3f})")
+            result = {
+                "primary_department": ranked[0],
+                "labels": ranked,
+                "scores": [scores[label] for label in ranked],
+                "keyword_hits": keyword_hits,
+                "tier": "embedding",
+            }
+            CLASSIFY_CACHE.set(key, result)
+            return result
+        candidates = ranked[:max(CANDIDATES, 2)]
 
-    primary_department = labels[np.argmax(scores)]
+    # Zero-shot on the candidate departments only: one NLI pass per label
+    excerpt = _informative_text(text, candidates, prototypes, chunk_vectors, offsets)
+    output = models.get("zero_shot")(excerpt, candidate_labels=candidates)
+    scores = _boosted(dict(zip(output["labels"], output["scores"])), keyword_hits)
+    labels = sorted(scores, key=scores.get, reverse=True)
+    primary_department = labels[0]
 
     logger.info(f"Primary department classified as: {primary_department}")
 
-    return {
+    result = {
         "primary_department": primary_department,
         "labels": labels,
-        "scores": scores,
+        "scores": [scores[label] for label in labels],
+        "keyword_hits": keyword_hits,
+        "tier": "zero_shot",
     }
+    CLASSIFY_CACHE.set(key, result)
+    return result
@@ -1,11 +1,77 @@
-from sentence_transformers import SentenceTransformer
-import faiss
+import os
+import base64
 import numpy as np
+from pipeline import backends, models
+from utils.chunking import chunk_text
+
+# torch, or ONNX Runtime with EMBED_BACKEND=onnx|onnx-int8; loaded on first use
+models.register("embeddings", lambda: backends.load_sentence_transformer("all-mpnet-base-v2"))
+
+# all-mpnet-base-v2 truncates at 384 word pieces, so documents are embedded
+# as overlapping chunks that stay under that limit.
+CHUNK_TOKENS = int(os.getenv("EMBED_CHUNK_TOKENS", "256"))
+CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", "32"))
+BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+# "float32" (plain JSON lists), "float16" or "int8" (base64, per-vector scale)
+CHUNK_DTYPE = os.getenv("EMBED_CHUNK_DTYPE", "float16")
 
-model = SentenceTransformer("all-mpnet-base-v2")
-index = faiss.IndexFlatL2(768)  # embedding size
 
 def embed_text(text_list):
-    embeddings = model.encode(text_list, convert_to_numpy=True)
-    index.add(embeddings) # type: ignore
-    return embeddings
\ No newline at end of file
+    """Encode texts; indexing documents is the job of pipeline.vector_store."""
+    embeddings = models.get("embeddings").encode(
+        text_list,
+        convert_to_numpy=True,
+        batch_size=BATCH_SIZE,
+        normalize_embeddings=True,
+    )
+    return embeddings
+
+
+def split_document(text: str):
+    """Overlapping chunk texts and their (start, end) offsets."""
+    chunks = chunk_text(text, CHUNK_TOKENS, CHUNK_OVERLAP)
+    texts = [c.text for c in chunks] or [text]
+    offsets = [(c.start, c.end) for c in chunks] or [(0, len(text))]
+    return texts, offsets
+
+
+def pool_document(offsets, vectors) -> dict:
+    """Mean-pool normalized chunk vectors into one L2-normalized document vector."""
+    pooled = vectors.mean(axis=0)
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+    return {"vector": pooled, "offsets": offsets, "chunk_vectors": vectors}
+
+
+def embed_document(text: str) -> dict:
+    """
+    Embed a whole document as overlapping chunks in one batched encode call.
+    Returns the chunk offsets, the chunk vectors and a mean-pooled,
+    L2-normalized document vector for callers that expect a single vector.
+    """
+    texts, offsets = split_document(text)
+    return pool_document(offsets, embed_text(texts))
+
+
+def encode_chunks(offsets, vectors, dtype: str = CHUNK_DTYPE) -> dict:
+    """
+    Compact, JSON-friendly form of the chunk vectors.
+    float16/int8 vectors are base64 encoded little-endian arrays; int8 vectors
+    carry a per-vector scale so that value = int8 * scale.
+    """
+    chunks = []
+    for (start, end), vector in zip(offsets, vectors):
+        item = {"start": start, "end": end}
+        if dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            quantized = np.clip(np.round(vector / scale), -127, 127).astype("<i1")
+            item["scale"] = scale
+            item["vector"] = base64.b64encode(quantized.tobytes()).decode("ascii")
+        elif dtype == "float16":
+            item["vector"] = base64.b64encode(vector.astype("<f2").tobytes()).decode("ascii")
+        else:
+            item["vector"] = vector.astype("float32").tolist()
+        chunks.append(item)
+
+    return {"dtype": dtype, "dim": int(vectors.shape[1]), "chunks": chunks}
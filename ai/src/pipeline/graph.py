@@ -0,0 +1,169 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Wall time of every pipeline step, graph stages and the steps before them
+STAGE_LATENCY = metrics.histogram("pipeline_stage_seconds", "Pipeline stage latency", ["stage", "outcome"])
+
+# A stage receives the shared context (inputs + outputs of finished stages)
+# and returns its own output, which is stored in the context under its name.
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: StageFn
+    deps: Tuple[str, ...] = ()
+    # Optional stages log their failure and yield None instead of failing the run
+    optional: bool = False
+    # Extra attempts after a failure; None uses the graph's stage_retries
+    retries: Optional[int] = None
+
+
+@dataclass
+class StageGraph:
+    """
+    Small dependency graph of async pipeline stages.
+    Stages whose dependencies are satisfied run concurrently, so the wall-clock
+    of a run is the longest dependency chain rather than the sum of all stages.
+    Dependencies may name other stages or keys of the initial context.
+    """
+
+    stages: Dict[str, Stage] = field(default_factory=dict)
+    # Default number of retries for a failing stage
+    stage_retries: int = 0
+
+    def add_stage(
+        self,
+        name: str,
+        fn: StageFn,
+        deps: Tuple[str, ...] = (),
+        optional: bool = False,
+        retries: Optional[int] = None,
+    ) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+        self.stages[name] = Stage(name=name, fn=fn, deps=tuple(deps), optional=optional, retries=retries)
+        try:
+            self._check_acyclic()
+        except ValueError:
+            # Leave the graph as it was
+            del self.stages[name]
+            raise
+        return self
+
+    def remove_stage(self, name: str) -> None:
+        dependents = [s.name for s in self.stages.values() if name in s.deps]
+        if dependents:
+            raise ValueError(f"Stage '{name}' is required by {dependents}")
+        self.stages.pop(name, None)
+
+    def order(self) -> List[str]:
+        """Topological order of the registered stages."""
+        ordered: List[str] = []
+        visiting = set()
+
+        def visit(name: str):
+            if name in ordered or name not in self.stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def _check_acyclic(self) -> None:
+        self.order()
+
+    def describe(self) -> List[dict]:
+        return [
+            {"name": name, "deps": list(self.stages[name].deps), "optional": self.stages[name].optional}
+            for name in self.order()
+        ]
+
+    async def run(
+        self,
+        context: Dict[str, Any],
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        failed: Optional[Set[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute every stage and return a dict of public stage outputs.
+        A failing required stage cancels the remaining stages and re-raises.
+        on_stage(name, output) is called as each public stage finishes, each
+        stage's seconds (after its dependencies) go into timings, and optional
+        stages that failed are added to failed.
+        """
+        ctx = dict(context)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        missing = {
+            dep
+            for stage in self.stages.values()
+            for dep in stage.deps
+            if dep not in self.stages and dep not in ctx
+        }
+        if missing:
+            raise ValueError(f"Unsatisfied stage dependencies: {sorted(missing)}")
+
+        async def run_stage(stage: Stage):
+            for dep in stage.deps:
+                if dep in tasks:
+                    await tasks[dep]
+            retries = self.stage_retries if stage.retries is None else stage.retries
+            started = time.perf_counter()
+            outcome = "cancelled"
+            try:
+                for attempt in range(retries + 1):
+                    try:
+                        result = await stage.fn(ctx)
+                        outcome = "ok"
+                        break
+                    except Exception as e:
+                        if attempt < retries:
+                            logger.warning(f"Stage '{stage.name}' failed ({e}); retrying")
+                            continue
+                        outcome = "error"
+                        if not stage.optional:
+                            raise
+                        logger.error(f"Optional stage '{stage.name}' failed: {e}")
+                        if failed is not None:
+                            failed.add(stage.name)
+                        result = None
+            finally:
+                elapsed = time.perf_counter() - started
+                STAGE_LATENCY.observe(elapsed, stage=stage.name, outcome=outcome)
+                if timings is not None:
+                    timings[stage.name] = round(elapsed, 4)
+            ctx[stage.name] = result
+            if on_stage is not None and not stage.name.startswith("_"):
+                on_stage(stage.name, result)
+            return result
+
+        # Tasks are created in topological order so every dependency task exists
+        for name in self.order():
+            tasks[name] = asyncio.create_task(run_stage(self.stages[name]))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        # Stages named with a leading underscore are internal to the run
+        return {name: ctx[name] for name in self.stages if not name.startswith("_")}
@@ -0,0 +1,162 @@
+import os
+import signal
+import socket
+import asyncio
+import logging
+import multiprocessing
+from typing import List
+from pipeline import llm_client, models, vector_store
+from pipeline.runner import DocumentPipeline
+from utils.job_queue import LANES, QUEUED, JobQueue
+from utils.uploads import SavedUpload
+
+logger = logging.getLogger(__name__)
+
+# /jobs uploads are kept in JOB_DIR and queued in the JOB_DB SQLite file.
+# The API spawns JOB_WORKERS worker processes (0 = run them separately with
+# `python -m pipeline.job_worker`); each claims jobs from JOB_LANES in
+# priority order. Failed stages are retried JOB_STAGE_RETRIES times within
+# an attempt, and a failed or abandoned job is retried up to
+# JOB_MAX_ATTEMPTS times with exponential backoff. Workers renew their lease
+# every JOB_HEARTBEAT_SECONDS; a job whose worker died is picked up again
+# once JOB_LEASE_SECONDS pass without a renewal.
+JOB_DB = os.getenv("JOB_DB", "data/jobs.db")
+JOB_DIR = os.getenv("JOB_DIR", "data/jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_LANES = [lane.strip() for lane in os.getenv("JOB_LANES", ",".join(LANES)).split(",") if lane.strip()]
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_STAGE_RETRIES = int(os.getenv("JOB_STAGE_RETRIES", "1"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "30"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "5"))
+
+
+def open_queue() -> JobQueue:
+    os.makedirs(os.path.dirname(os.path.abspath(JOB_DB)), exist_ok=True)
+    os.makedirs(JOB_DIR, exist_ok=True)
+    return JobQueue(JOB_DB, lease_seconds=JOB_LEASE_SECONDS, retry_backoff=JOB_RETRY_BACKOFF)
+
+
+def discard_upload(payload: dict) -> None:
+    try:
+        os.unlink(payload["path"])
+    except (KeyError, FileNotFoundError):
+        pass
+
+
+async def run_job(queue: JobQueue, pipeline: DocumentPipeline, job: dict, worker: str) -> None:
+    payload = job["payload"]
+    job_id = job["id"]
+    upload = SavedUpload(
+        filename=payload["file_name"], path=payload["path"], size=payload["size"], sha256=payload["sha256"]
+    )
+
+    async def work() -> dict:
+        result = await pipeline.cached(upload.sha256, upload.filename, payload["document_id"])
+        if result is None:
+            result = await pipeline.process(upload, payload["document_id"])
+            await pipeline.store(upload.sha256, result)
+        return result
+
+    logger.info(f"Job {job_id} started (attempt {job['attempt']}): {upload.filename}")
+    task = asyncio.create_task(work())
+    # Renew the lease while the pipeline runs; a refused heartbeat means cancelled
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=JOB_HEARTBEAT_SECONDS)
+        if done:
+            break
+        if not queue.heartbeat(job_id, worker):
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            if queue.cancelled(job_id, worker):
+                logger.info(f"Job {job_id} cancelled")
+                discard_upload(payload)
+            else:
+                logger.warning(f"Job {job_id} lost its lease")
+            return
+
+    # The upload is only removed by the worker that still owns the job; after
+    # a lost lease another worker may be processing the same file
+    try:
+        result = task.result()
+    except Exception as e:
+        status = queue.fail(job_id, worker, str(e) or type(e).__name__)
+        if status is None:
+            logger.warning(f"Job {job_id} failed after losing its lease: {e}")
+            return
+        logger.error(f"Job {job_id} failed on attempt {job['attempt']} ({status}): {e}")
+        if status != QUEUED:
+            discard_upload(payload)
+        return
+    if not queue.complete(job_id, worker, result):
+        logger.warning(f"Job {job_id} finished after losing its lease; result dropped")
+        return
+    discard_upload(payload)
+    logger.info(f"Job {job_id} done")
+
+
+async def worker_loop(worker: str, lanes: List[str] = JOB_LANES) -> None:
+    queue = open_queue()
+    # The API process owns the vector index and indexes finished jobs itself
+    vector_store.use_read_only_store()
+    pipeline = DocumentPipeline(stage_retries=JOB_STAGE_RETRIES)
+    try:
+        while True:
+            # Jobs of workers that died mid-run; remove uploads of those now finished
+            for finished in queue.reap():
+                discard_upload(finished)
+            job = queue.claim(worker, lanes)
+            if job is None:
+                await asyncio.sleep(JOB_POLL_SECONDS)
+                continue
+            await run_job(queue, pipeline, job, worker)
+    finally:
+        await pipeline.close()
+        await llm_client.close_client()
+        models.REGISTRY.close()
+        queue.close()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info(f"Job worker {worker} serving lanes {JOB_LANES}")
+    # stop_workers() terminates; unwind so pools and the LLM client close cleanly
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        asyncio.run(worker_loop(worker))
+    except KeyboardInterrupt:
+        pass
+
+
+def start_workers(count: int = JOB_WORKERS) -> List[multiprocessing.Process]:
+    # Spawned, not forked: the API process has pools and model threads running.
+    # Not daemonic, since the OCR and parse pools start processes of their own.
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for n in range(count):
+        process = context.Process(target=main, name=f"job-worker-{n}")
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_workers(processes: List[multiprocessing.Process], timeout: float = 10) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+def is_acronym(keyword: str) -> bool:
+    """Keywords like "IT", "PO" or "E&M" only match in their original case."""
+    return any(sum(ch.isupper() for ch in token) >= 2 for token in keyword.split())
+
+
+def trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """
+    Compile words into a trie-shaped regex so the engine follows shared
+    prefixes once instead of trying hundreds of alternatives at each position.
+    Longer keywords win over their prefixes ("maintenance report" > "maintenance").
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alternatives = []
+        terminal = False
+        for ch in sorted(node):
+            if ch == "":
+                terminal = True
+                continue
+            # Multi-word keywords also match across line breaks in OCR text
+            head = r"\s+" if ch == " " else re.escape(ch)
+            alternatives.append(head + build(node[ch]))
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie) or None
+
+
+class KeywordMatcher:
+    """
+    Single-pass keyword counter for a {group: [keywords]} mapping.
+    All keywords are compiled once into one regex with word boundaries, so
+    "IT" no longer matches inside "with" and plurals ("tenders") still count.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.groups = groups
+        self._keyword_groups: Dict[str, List[str]] = {}
+        folded, exact = set(), set()
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                if is_acronym(keyword):
+                    key = keyword
+                    exact.add(keyword)
+                else:
+                    key = keyword.lower()
+                    folded.add(key)
+                self._keyword_groups.setdefault(key, [])
+                if group not in self._keyword_groups[key]:
+                    self._keyword_groups[key].append(group)
+
+        parts = []
+        folded_pattern = trie_pattern(folded)
+        if folded_pattern:
+            parts.append(f"(?i:{folded_pattern})(?i:e?s)?")
+        exact_pattern = trie_pattern(exact)
+        if exact_pattern:
+            parts.append(exact_pattern)
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(parts) + r")(?!\w)")
+
+    def _keyword(self, matched: str) -> Optional[str]:
+        matched = " ".join(matched.split())
+        if matched in self._keyword_groups:
+            return matched
+        lowered = matched.lower()
+        for candidate in (lowered, lowered[:-2], lowered[:-1]):
+            if candidate in self._keyword_groups:
+                return candidate
+        return None
+
+    def keyword_counts(self, text: str) -> Counter:
+        """Occurrences of each keyword, found in one scan of the text."""
+        counts: Counter = Counter()
+        for match in self.pattern.finditer(text):
+            keyword = self._keyword(match.group())
+            if keyword is not None:
+                counts[keyword] += 1
+        return counts
+
+    def group_counts(self, text: str) -> Dict[str, int]:
+        """Keyword hits per group; a keyword listed in several groups counts for each."""
+        hits = {group: 0 for group in self.groups}
+        for keyword, count in self.keyword_counts(text).items():
+            for group in self._keyword_groups[keyword]:
+                hits[group] += count
+        return hits
@@ -0,0 +1,153 @@
+import os
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+import httpx
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Any OpenAI-compatible chat completions endpoint works, including a local fake
+# (see benchmarks/fake_llm_server.py) for tests and benchmarks.
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+# The key is never defaulted; get_client() fails clearly when it is unset
+LLM_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))
+LLM_MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "20"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+LLM_LATENCY = metrics.histogram("llm_request_seconds", "LLM request latency", ["outcome"])
+LLM_REQUESTS = metrics.counter("llm_requests_total", "LLM HTTP requests", ["status"])
+LLM_RETRIES = metrics.counter("llm_retries_total", "LLM requests retried")
+LLM_ERRORS = metrics.counter("llm_errors_total", "LLM calls that failed after retries")
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens reported by the LLM backend", ["kind"])
+LLM_COALESCED = metrics.counter("llm_coalesced_total", "LLM calls served by an identical in-flight request")
+
+_client: Optional[httpx.AsyncClient] = None
+# Identical prompts in flight share one request
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+class LLMError(Exception):
+    """Raised when the LLM backend fails after all retries."""
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared keep-alive client, created on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        if not LLM_API_KEY:
+            raise LLMError("GROQ_API_KEY is not set; export it (any value works for a local fake server)")
+        _client = httpx.AsyncClient(
+            base_url=LLM_BASE_URL,
+            headers={
+                "Authorization": f"Bearer {LLM_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    if response is not None and "retry-after" in response.headers:
+        try:
+            return float(response.headers["retry-after"])
+        except ValueError:
+            pass
+    # Full jitter keeps concurrent chunk requests from retrying in lockstep
+    return random.uniform(0, min(LLM_MAX_BACKOFF, LLM_BACKOFF * (2 ** attempt)))
+
+
+def _record_usage(data: dict) -> None:
+    usage = data.get("usage") or {}
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if kind in usage:
+            LLM_TOKENS.inc(usage[kind], kind=kind.replace("_tokens", ""))
+
+
+async def _post_with_retries(payload: dict) -> str:
+    last_error: Optional[Exception] = None
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        response = None
+        start = time.perf_counter()
+        try:
+            response = await get_client().post("/chat/completions", json=payload)
+            LLM_REQUESTS.inc(status=response.status_code)
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                data = response.json()
+                content = data["choices"][0]["message"]["content"]
+                LLM_LATENCY.observe(time.perf_counter() - start, outcome="ok")
+                _record_usage(data)
+                return content
+            last_error = LLMError(f"LLM backend returned {response.status_code}")
+        except httpx.TransportError as e:
+            LLM_REQUESTS.inc(status="transport_error")
+            last_error = e
+        except (httpx.HTTPStatusError, KeyError, ValueError) as e:
+            LLM_LATENCY.observe(time.perf_counter() - start, outcome="error")
+            LLM_ERRORS.inc()
+            raise LLMError(f"LLM request failed: {e}") from e
+        LLM_LATENCY.observe(time.perf_counter() - start, outcome="retry")
+
+        if attempt < LLM_MAX_RETRIES:
+            delay = _retry_delay(attempt, response)
+            LLM_RETRIES.inc()
+            logger.warning(f"LLM request failed ({last_error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    LLM_ERRORS.inc()
+    raise LLMError(f"LLM request failed after {LLM_MAX_RETRIES + 1} attempts: {last_error}")
+
+
+async def chat_completion(
+    messages: List[dict],
+    max_tokens: int = 2048,
+    temperature: float = 0.1,
+    model: Optional[str] = None,
+) -> str:
+    """
+    Send a chat completion request and return the message content.
+    Retries transport errors, 429 and 5xx responses with jittered exponential
+    backoff; concurrent calls with an identical payload share one request.
+    """
+    payload = {
+        "model": model or LLM_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": False,
+    }
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    task = _inflight.get(key)
+    if task is not None:
+        LLM_COALESCED.inc()
+    else:
+        task = asyncio.ensure_future(_post_with_retries(payload))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller being cancelled does not cancel the shared request
+    return await asyncio.shield(task)
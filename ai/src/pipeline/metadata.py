@@ -1,10 +1,28 @@
+import os
 import re
-from typing import Dict, List
-import spacy
-from spacy.tokens import Span
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+from pipeline import models
+from pipeline.keyword_matcher import is_acronym, trie_pattern
+from utils.chunking import CHARS_PER_TOKEN, chunk_text
 
-# Load English NER model
-nlp = spacy.load("en_core_web_sm")
+# English NER model, loaded on first use with only the components NER needs;
+# the tagger, parser and lemmatizer are never read and dominate spaCy's runtime.
+NER_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+
+def _load_nlp():
+    import spacy
+
+    return spacy.load("en_core_web_sm", exclude=NER_EXCLUDE)
+
+
+models.register("ner", _load_nlp)
+
+# Long texts are split on sentence boundaries and streamed through nlp.pipe
+NER_CHUNK_CHARS = int(os.getenv("NER_CHUNK_CHARS", "100000"))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "8"))
+NER_N_PROCESS = int(os.getenv("NER_N_PROCESS", "1"))
+NER_LABELS = {"ORG", "GPE"}
 
 # Regex patterns
 TENDER_ID_PATTERN = r"KMRL/PROCITENDER/\d{4}-\d{2}/\d+"
@@ -15,10 +33,12 @@ EMAIL_PATTERN = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
 PHONE_PATTERN = r"\b\d{10}\b|\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b"
 URL_PATTERN = r"https?://\S+|www\.\S+"
 
+_CURRENCY_CHARS = re.compile(r"[₹Rs\. ]")
+
 
 def normalize_amount(amount: str) -> str:
     """Standardize currency format"""
-    cleaned = re.sub(r"[₹Rs\. ]", "", amount)
+    cleaned = _CURRENCY_CHARS.sub("", amount)
     cleaned = cleaned.replace(",", "")
     try:
         if "." in cleaned:
@@ -32,67 +52,149 @@ def normalize_amount(amount: str) -> str:
     return normalized
 
 
-def extract_metadata(text: str) -> Dict[str, List[str]]:
-    """Extract comprehensive metadata from KMRL documents"""
+DEPARTMENT_KEYWORDS = [
+    "Operations",
+    "Maintenance",
+    "Engineering",
+    "Infrastructure",
+    "Electrical",
+    "Mechanical",
+    "Finance",
+    "Accounts",
+    "HR",
+    "Legal",
+    "Compliance",
+    "Procurement",
+    "Contracts",
+    "Corporate Communications",
+    "Business Development",
+    "Vigilance",
+    "Security",
+    "IT",
+    "Planning",
+    "Environment",
+    "Sustainability",
+    "Customer Relations",
+    "Project Management",
+]
+
+# Canonical spelling of each keyword, by the form the scanner reports
+_KEYWORD_NAMES = {
+    (kw if is_acronym(kw) else kw.lower()): kw for kw in DEPARTMENT_KEYWORDS
+}
+KEYWORD_PATTERN = r"(?<!\w)(?:(?i:{folded})|{exact})(?!\w)".format(
+    folded=trie_pattern(kw.lower() for kw in DEPARTMENT_KEYWORDS if not is_acronym(kw)),
+    exact=trie_pattern(kw for kw in DEPARTMENT_KEYWORDS if is_acronym(kw)),
+)
+
+# Every pattern compiled once into a single alternation. Order matters:
+# at a given position the first kind that matches wins, so the more specific
+# patterns (URLs, e-mails, tender ids) come before the generic number ones.
+SCANNER = re.compile(
+    "|".join(
+        f"(?P<{kind}>{pattern})"
+        for kind, pattern in [
+            ("url", URL_PATTERN),
+            ("email", EMAIL_PATTERN),
+            ("tender_id", TENDER_ID_PATTERN),
+            ("invoice_id", INVOICE_PATTERN),
+            ("date", DATE_PATTERN),
+            ("phone", PHONE_PATTERN),
+            ("amount", AMOUNT_PATTERN),
+            ("keyword", KEYWORD_PATTERN),
+        ]
+    )
+)
+
+
+class MetadataMatch(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+def scan(text: str) -> Iterator[MetadataMatch]:
+    """Walk the text once, yielding typed regex matches with their offsets."""
+    for match in SCANNER.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "keyword":
+            # Multi-word keywords may span line breaks in OCR output
+            value = " ".join(value.split())
+            value = _KEYWORD_NAMES[value if value in _KEYWORD_NAMES else value.lower()]
+        yield MetadataMatch(kind, value, match.start(), match.end())  # type: ignore
 
-    # Regex-based extraction
-    tender_ids = re.findall(TENDER_ID_PATTERN, text)
-    invoice_ids = re.findall(INVOICE_PATTERN, text)
-    amounts = [normalize_amount(a) for a in re.findall(AMOUNT_PATTERN, text)]
-    dates = re.findall(DATE_PATTERN, text)
-    emails = re.findall(EMAIL_PATTERN, text)
-    phones = re.findall(PHONE_PATTERN, text)
-    urls = re.findall(URL_PATTERN, text)
-
-    # SpaCy-based NER
-    doc = nlp(text)
-    orgs = [ent.text for ent in doc.ents if ent.label_ == "ORG"]
-    gpes = [ent.text for ent in doc.ents if ent.label_ == "GPE"]
-
-    # Optional: Keywords / topics (simple heuristic)
-    keywords = []
-    department_keywords = [
-        "Operations",
-        "Maintenance",
-        "Engineering",
-        "Infrastructure",
-        "Electrical",
-        "Mechanical",
-        "Finance",
-        "Accounts",
-        "HR",
-        "Legal",
-        "Compliance",
-        "Procurement",
-        "Contracts",
-        "Corporate Communications",
-        "Business Development",
-        "Vigilance",
-        "Security",
-        "IT",
-        "Planning",
-        "Environment",
-        "Sustainability",
-        "Customer Relations",
-        "Project Management",
-    ]
-    for kw in department_keywords:
-        if re.search(rf"\b{kw}\b", text, re.IGNORECASE):
-            keywords.append(kw)
+
+class Entity(NamedTuple):
+    label: str
+    text: str
+    start: int
+    end: int
+
+
+def extract_entities(texts: List[str]) -> List[List[Entity]]:
+    """
+    Run NER over many texts at once. Each text is cut into chunks of at most
+    NER_CHUNK_CHARS, all chunks go through one nlp.pipe call, and entity
+    offsets are shifted back to positions in the original text.
+    """
+    def chunks() -> Iterator[Tuple[str, Tuple[int, int]]]:
+        for i, text in enumerate(texts):
+            for chunk in chunk_text(text, NER_CHUNK_CHARS // CHARS_PER_TOKEN):
+                yield chunk.text, (i, chunk.start)
+
+    entities: List[List[Entity]] = [[] for _ in texts]
+    docs = models.get("ner").pipe(chunks(), as_tuples=True, batch_size=NER_BATCH_SIZE, n_process=NER_N_PROCESS)
+    for doc, (i, offset) in docs:
+        for ent in doc.ents:
+            if ent.label_ in NER_LABELS:
+                entities[i].append(
+                    Entity(ent.label_, ent.text, ent.start_char + offset, ent.end_char + offset)
+                )
+    return entities
+
+
+def _regex_metadata(text: str) -> Dict[str, List[str]]:
+    # Regex-based extraction, one pass over the text
+    found: Dict[str, List[str]] = {
+        "url": [], "email": [], "tender_id": [], "invoice_id": [],
+        "date": [], "phone": [], "amount": [], "keyword": [],
+    }
+    for match in scan(text):
+        found[match.kind].append(match.value)
+    return found
+
+
+def _build_metadata(found: Dict[str, List[str]], entities: List[Entity]) -> Dict[str, List[str]]:
+    amounts = [normalize_amount(a) for a in found["amount"]]
+    orgs = [ent.text for ent in entities if ent.label == "ORG"]
+    gpes = [ent.text for ent in entities if ent.label == "GPE"]
 
     # Remove duplicates
     def unique(lst):
         return list(set(lst))
 
     return {
-        "tender_ids": tender_ids,
-        "invoice_ids": invoice_ids,
+        "tender_ids": found["tender_id"],
+        "invoice_ids": found["invoice_id"],
         "amounts": unique(amounts),
-        "dates": unique(dates),
-        "emails": unique(emails),
-        "phone_numbers": unique(phones),
-        "urls": unique(urls),
+        "dates": unique(found["date"]),
+        "emails": unique(found["email"]),
+        "phone_numbers": unique(found["phone"]),
+        "urls": unique(found["url"]),
         "organizations": unique(orgs),
         "locations": unique(gpes),
-        "keywords": unique(keywords),
+        "keywords": unique(found["keyword"]),
     }
+
+
+def extract_metadata_batch(texts: List[str]) -> List[Dict[str, List[str]]]:
+    """Extract metadata for many documents, sharing one NER pipe across them."""
+    entities = extract_entities(texts)
+    return [_build_metadata(_regex_metadata(text), ents) for text, ents in zip(texts, entities)]
+
+
+def extract_metadata(text: str) -> Dict[str, List[str]]:
+    """Extract comprehensive metadata from KMRL documents"""
+    return extract_metadata_batch([text])[0]
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Models are loaded on first use instead of at import, so a replica only pays
+# for the models its role needs. AI_ROLE selects the endpoints a replica
+# serves and which models it preloads in the background at startup;
+# MODEL_PRELOAD (comma separated, "none" for fully lazy) overrides the list.
+AI_ROLE = os.getenv("AI_ROLE", "all")
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD")
+
+ROLE_FEATURES = {
+    "all": {"process", "extract", "search", "vectors", "jobs"},
+    "process": {"process", "extract", "vectors", "jobs"},
+    "search": {"search", "vectors"},
+    "ocr": {"extract"},
+}
+ROLE_MODELS = {
+    "all": ["ocr", "zero_shot", "ner", "embeddings"],
+    "process": ["ocr", "zero_shot", "ner", "embeddings"],
+    "search": ["embeddings"],
+    "ocr": ["ocr"],
+}
+
+LOAD_SECONDS = metrics.histogram(
+    "model_load_seconds", "Time to load a model", ["model"], buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+
+class _Entry:
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self.model: Any = None
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Named, lazily loaded models shared by every stage of the process.
+    get() loads a model once, even when several threads ask at the same time.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        if name not in self._entries:
+            self._entries[name] = _Entry(loader)
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if entry.state == "ready":
+            return entry.model
+        with entry.lock:
+            if entry.state != "ready":
+                entry.state = "loading"
+                started = time.perf_counter()
+                try:
+                    entry.model = entry.loader()
+                except Exception as e:
+                    entry.state, entry.error = "failed", str(e)
+                    logger.error(f"Loading model '{name}' failed: {e}")
+                    raise
+                entry.load_seconds = time.perf_counter() - started
+                entry.state, entry.error = "ready", None
+                LOAD_SECONDS.observe(entry.load_seconds, model=name)
+                logger.info(f"Loaded model '{name}' in {entry.load_seconds:.1f}s")
+        return entry.model
+
+    def preload(self, names: Iterable[str]) -> None:
+        for name in names:
+            try:
+                self.get(name)
+            except Exception:
+                # Already logged; readiness reports the failure
+                pass
+
+    def close(self) -> None:
+        """Shut down loaded models that own workers (the OCR process pool)."""
+        for name, entry in self._entries.items():
+            shutdown = getattr(entry.model, "shutdown", None)
+            if entry.state == "ready" and callable(shutdown):
+                shutdown()
+                entry.model, entry.state = None, "not_loaded"
+
+    def ready(self, names: Iterable[str]) -> bool:
+        return all(self._entries[n].state == "ready" for n in names if n in self._entries)
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {"state": e.state, "load_seconds": e.load_seconds, "error": e.error}
+            for name, e in self._entries.items()
+        }
+
+
+REGISTRY = ModelRegistry()
+register = REGISTRY.register
+get = REGISTRY.get
+
+
+def serves(feature: str, role: str = AI_ROLE) -> bool:
+    return feature in ROLE_FEATURES.get(role, ROLE_FEATURES["all"])
+
+
+def preload_list(role: str = AI_ROLE) -> List[str]:
+    if MODEL_PRELOAD is not None:
+        if MODEL_PRELOAD.strip().lower() == "none":
+            return []
+        return [name.strip() for name in MODEL_PRELOAD.split(",") if name.strip()]
+    return list(ROLE_MODELS.get(role, ROLE_MODELS["all"]))
@@ -1,33 +1,76 @@
+import os
+import queue
 import logging
-import easyocr
-from pdf2image import convert_from_path
-from typing import List
+import threading
+from pdf2image import convert_from_path, pdfinfo_from_path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from PIL import Image
 import numpy as np
 import warnings
-from concurrent.futures import ThreadPoolExecutor
+from pipeline import models
 
 warnings.filterwarnings("ignore", message=".*pin_memory.*")
 
-# Initialize EasyOCR once (reuse across calls)
-READER = easyocr.Reader(["en"], gpu=True)
+# "auto" uses the GPU only when torch can see one
+OCR_GPU = os.getenv("OCR_GPU", "auto")
+
+# Scanned PDFs are rendered one page at a time into a queue of at most
+# OCR_QUEUE_PAGES bitmaps, so peak memory does not grow with page count
+OCR_DPI = int(os.getenv("OCR_DPI", "150"))
+# "processes" runs one EasyOCR reader per process (pipeline.ocr_pool);
+# "threads" shares a single reader. "auto" picks processes on CPU-only hosts.
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4"))
+OCR_QUEUE_PAGES = int(os.getenv("OCR_QUEUE_PAGES", "4"))
+
+
+def _use_gpu() -> bool:
+    if OCR_GPU != "auto":
+        return OCR_GPU == "1"
+    try:
+        import torch
+
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def _use_processes() -> bool:
+    if OCR_ENGINE == "auto":
+        return not _use_gpu()
+    return OCR_ENGINE == "processes"
+
+
+def _load_reader():
+    if _use_processes():
+        from pipeline.ocr_pool import OCRPool
+
+        pool = OCRPool()
+        pool.warm_up()
+        return pool
+
+    import easyocr
+
+    return easyocr.Reader(["en"], gpu=_use_gpu())
+
+
+# EasyOCR (or the OCR process pool) is loaded once, on first use
+models.register("ocr", _load_reader)
 
 
 def extract_text_from_file(file_path: str) -> str:
     """
-    Extract text from any file using OCR with faster parallel processing.
+    Extract text from any file using OCR. PDF pages are rendered and
+    recognized as a stream, in parallel, and joined in page order.
     """
     text = ""
 
     try:
         if file_path.lower().endswith(".pdf"):
-            images = pdf_to_images(file_path)
-
-            # Use ThreadPoolExecutor to run OCR on pages in parallel
-            with ThreadPoolExecutor(max_workers=min(4, len(images))) as executor:
-                results = list(executor.map(_ocr_image, images))
-            
-            text = " ".join(results)
+            # Enough threads to keep every OCR process busy
+            reader = models.get("ocr")
+            workers = getattr(reader, "workers", OCR_WORKERS)
+            text = " ".join(ocr_pages(iter_pdf_pages(file_path), workers=workers, reader=reader))
 
         else:
             logging.info(f"Performing OCR on image file {file_path}")
@@ -37,11 +80,114 @@ def extract_text_from_file(file_path: str) -> str:
         logging.error(f"OCR extraction failed for {file_path}: {e}")
         text = ""
 
-    logging.info(f"Final extracted text for {file_path}: {text.strip()}")
-    return text.strip()
+    text = text.strip()
+    logging.info(f"OCR extracted {len(text)} characters from {file_path}")
+    return text
 
 
-def _ocr_image(image_input) -> str:
+def extract_text_from_pages(file_path: str, pages: Iterable[int]) -> Dict[int, str]:
+    """OCR only the given (0-based) PDF pages; returns {page index: text}."""
+    pages = sorted(set(pages))
+    if not pages:
+        return {}
+    try:
+        reader = models.get("ocr")
+        workers = min(getattr(reader, "workers", OCR_WORKERS), len(pages))
+        texts = ocr_pages(iter_pdf_pages(file_path, pages=pages), workers=workers, reader=reader)
+    except Exception as e:
+        logging.error(f"OCR extraction failed for {file_path} pages {pages}: {e}")
+        return {}
+    logging.info(f"OCR extracted {len(pages)} pages of {file_path}")
+    return dict(zip(pages, texts))
+
+
+def iter_pdf_pages(
+    file_path: str, dpi: int = OCR_DPI, pages: Optional[Iterable[int]] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (page index, RGB array) one page at a time, for all pages or
+    only the given 0-based page indexes.
+    Uses PyMuPDF when available, else pdf2image one page per call.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        try:
+            import fitz  # PyMuPDF < 1.24
+        except ImportError:
+            fitz = None
+
+    if fitz is not None:
+        with fitz.open(file_path) as pdf:
+            for index in (range(pdf.page_count) if pages is None else pages):
+                page = pdf[index]
+                pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+                # Copy out of the pixmap so its buffer is released right away
+                array = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+                    pixmap.height, pixmap.width, pixmap.n
+                ).copy()
+                del pixmap
+                yield index, array
+        return
+
+    if pages is None:
+        pages = range(pdfinfo_from_path(file_path)["Pages"])
+    for index in pages:
+        image = convert_from_path(file_path, dpi=dpi, first_page=index + 1, last_page=index + 1)[0]
+        yield index, np.array(image.convert("RGB"))
+        image.close()
+
+
+def ocr_pages(
+    pages: Iterator[Tuple[int, np.ndarray]],
+    workers: int = OCR_WORKERS,
+    max_queued: int = OCR_QUEUE_PAGES,
+    reader=None,
+) -> List[str]:
+    """
+    OCR pages as they are produced. A renderer thread fills a bounded queue
+    and each bitmap is dropped as soon as its page is recognized.
+    Returns page texts in page order.
+    """
+    reader = reader or models.get("ocr")
+    work: queue.Queue = queue.Queue(maxsize=max_queued)
+    results = {}
+    errors = []
+    done = object()
+
+    def render():
+        try:
+            for item in pages:
+                work.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(workers):
+                work.put(done)
+
+    def recognize():
+        while True:
+            item = work.get()
+            if item is done:
+                return
+            index, array = item
+            del item
+            results[index] = _ocr_image(array, reader)
+            del array
+
+    threads = [threading.Thread(target=render, daemon=True)]
+    threads += [threading.Thread(target=recognize, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    logging.info(f"OCR finished for {len(results)} pages")
+    return [results[i] for i in sorted(results)]
+
+
+def _ocr_image(image_input, reader=None) -> str:
     """
     Perform OCR on a single image or image file path.
     """
@@ -51,26 +197,8 @@ def _ocr_image(image_input) -> str:
         else:
             img_array = image_input  # file path string, EasyOCR can handle it directly
 
-        result = READER.readtext(img_array, detail=0)
+        result = (reader or models.get("ocr")).readtext(img_array, detail=0)
         return " ".join(result)  # type: ignore
     except Exception as e:
         logging.error(f"OCR failed on image: {e}")
         return ""
-
-
-def pdf_to_images(file_path: str) -> List[Image.Image]:
-    """
-    Convert a PDF file to a list of PIL Image objects, one per page.
-    Uses faster settings for pdf2image.
-    """
-    try:
-        logging.info(f"Starting PDF to image conversion for {file_path}")
-        # You can reduce DPI to speed up conversion if high-res not needed
-        images = convert_from_path(file_path, dpi=150, thread_count=4)
-        logging.info(
-            f"Completed PDF to image conversion for {file_path}, {len(images)} pages found"
-        )
-        return images
-    except Exception as e:
-        logging.error(f"PDF to image conversion failed for {file_path}: {e}")
-        return []
\ No newline at end of file
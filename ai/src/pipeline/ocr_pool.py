@@ -0,0 +1,88 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Torch threads per OCR process; the pool gets cpu_count / OCR_TORCH_THREADS
+# processes unless OCR_PROCESSES is set
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "2"))
+OCR_PROCESSES = int(os.getenv("OCR_PROCESSES", "0")) or max(1, (os.cpu_count() or 1) // OCR_TORCH_THREADS)
+
+# Per-process reader, created once by the pool initializer
+_reader = None
+
+
+def _init_worker(languages, torch_threads: int):
+    global _reader
+    import torch
+    import easyocr
+
+    torch.set_num_threads(torch_threads)
+    _reader = easyocr.Reader(languages, gpu=False)
+
+
+def _ping() -> bool:
+    return _reader is not None
+
+
+def _readtext_shared(name: str, shape, dtype: str) -> list:
+    # Attach to the page buffer written by the parent; nothing is pickled
+    shm = shared_memory.SharedMemory(name=name)
+    image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        return _reader.readtext(image, detail=0)
+    finally:
+        # The view must go before the mapping can be closed
+        del image
+        shm.close()
+
+
+def _readtext_path(path: str) -> list:
+    return _reader.readtext(path, detail=0)
+
+
+class OCRPool:
+    """
+    EasyOCR on a pool of processes, each holding its own reader, so pages
+    are recognized in parallel instead of queueing on one model and the GIL.
+    Page bitmaps travel through shared memory rather than the pickle pipe.
+    readtext() mirrors easyocr.Reader.readtext(detail=0) and blocks until
+    the page is done; call it from several threads to keep every process busy.
+    """
+
+    def __init__(self, workers: int = OCR_PROCESSES, languages=("en",), torch_threads: int = OCR_TORCH_THREADS):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(languages), torch_threads),
+        )
+
+    def warm_up(self) -> None:
+        """Start every process and load its reader before the first page."""
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        logger.info(f"OCR pool ready with {self.workers} processes")
+
+    def readtext(self, image: Union[str, np.ndarray], detail: int = 0) -> list:
+        if isinstance(image, str):
+            return self._pool.submit(_readtext_path, image).result()
+
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            return self._pool.submit(_readtext_shared, shm.name, image.shape, image.dtype.str).result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
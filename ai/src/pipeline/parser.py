@@ -1,26 +1,203 @@
+import os
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
 from docx import Document
 import pdfplumber
 
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz  # PyMuPDF < 1.24
+    except ImportError:
+        fitz = None
+
 logger = logging.getLogger(__name__)
 
-def extract_text_pdf(file_path: str) -> str:
+# A PDF page is sent to OCR when its text layer has fewer than
+# PDF_MIN_PAGE_CHARS characters, or when images cover at least
+# PDF_SCAN_COVERAGE of the page and the text layer is still thin
+# (PDF_SCAN_MAX_CHARS), as with scans carrying a stamped header.
+PDF_MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", "25"))
+PDF_SCAN_COVERAGE = float(os.getenv("PDF_SCAN_COVERAGE", "0.8"))
+PDF_SCAN_MAX_CHARS = int(os.getenv("PDF_SCAN_MAX_CHARS", "300"))
+
+# "pymupdf" reads text layers in C and falls back to pdfplumber only for
+# table-heavy pages (at least PDF_TABLE_BLOCKS short text blocks), whose
+# layout pdfplumber keeps better. "auto" uses PyMuPDF when it is installed.
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")
+PDF_TABLE_BLOCKS = int(os.getenv("PDF_TABLE_BLOCKS", "40"))
+PDF_TABLE_BLOCK_CHARS = int(os.getenv("PDF_TABLE_BLOCK_CHARS", "40"))
+# Documents with at least PDF_PARALLEL_PAGES pages are split into page
+# ranges parsed by PDF_PARSE_PROCESSES subprocesses; 0 disables
+PDF_PARALLEL_PAGES = int(os.getenv("PDF_PARALLEL_PAGES", "0"))
+PDF_PARSE_PROCESSES = int(os.getenv("PDF_PARSE_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+
+class PageText(NamedTuple):
+    index: int
+    text: str
+    image_coverage: float
+    needs_ocr: bool
+
+
+def needs_ocr(text: str, image_coverage: float) -> bool:
+    chars = len("".join(text.split()))
+    if chars < PDF_MIN_PAGE_CHARS:
+        return True
+    return image_coverage >= PDF_SCAN_COVERAGE and chars < PDF_SCAN_MAX_CHARS
+
+
+def _image_coverage(page) -> float:
+    """Share of the page area covered by images (overlaps are not merged)."""
+    area = float(page.width * page.height) or 1.0
+    covered = sum(
+        max(0.0, float(img["x1"] - img["x0"])) * max(0.0, float(img["bottom"] - img["top"]))
+        for img in page.images
+    )
+    return min(covered / area, 1.0)
+
+
+def _engine(engine: Optional[str] = None) -> str:
+    engine = engine or PDF_ENGINE
+    if engine == "auto":
+        return "pymupdf" if fitz is not None else "pdfplumber"
+    if engine == "pymupdf" and fitz is None:
+        logger.warning("PyMuPDF is not installed; using pdfplumber")
+        return "pdfplumber"
+    return engine
+
+
+def _page_count(file_path: str, engine: str) -> int:
+    if engine == "pymupdf":
+        with fitz.open(file_path) as pdf:
+            return pdf.page_count
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _analyze_pdfplumber(file_path: str, start: int, stop: Optional[int]) -> List[PageText]:
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for index, page in enumerate(pdf.pages[start:stop], start):
+            text = page.extract_text() or ""
+            coverage = _image_coverage(page)
+            pages.append(PageText(index, text, coverage, needs_ocr(text, coverage)))
+            # pdfplumber caches parsed objects per page; drop them as we go
+            page.flush_cache()
+    return pages
+
+
+def _is_table_page(blocks: list) -> bool:
+    if len(blocks) < PDF_TABLE_BLOCKS:
+        return False
+    short = sum(len(b[4].strip()) < PDF_TABLE_BLOCK_CHARS for b in blocks)
+    return short >= 0.75 * len(blocks)
+
+
+def _analyze_pymupdf(file_path: str, start: int, stop: Optional[int]) -> List[PageText]:
+    pages, table_pages = [], []
+    with fitz.open(file_path) as pdf:
+        stop = pdf.page_count if stop is None else min(stop, pdf.page_count)
+        for index in range(start, stop):
+            page = pdf[index]
+            area = float(page.rect.width * page.rect.height) or 1.0
+            rects = [fitz.Rect(info["bbox"]) for info in page.get_image_info()]
+            covered = sum(rect.width * rect.height for rect in rects)
+            coverage = min(covered / area, 1.0)
+            # Text blocks only (type 0), in reading order
+            blocks = [b for b in page.get_text("blocks", sort=True) if b[6] == 0]
+            text = "\n".join(b[4].strip() for b in blocks)
+            if _is_table_page(blocks):
+                table_pages.append(len(pages))
+            pages.append(PageText(index, text, coverage, needs_ocr(text, coverage)))
+
+    if table_pages:
+        # Table layouts read better through pdfplumber's character clustering
+        with pdfplumber.open(file_path) as pdf:
+            for position in table_pages:
+                page = pages[position]
+                plumber_page = pdf.pages[page.index]
+                text = plumber_page.extract_text() or page.text
+                plumber_page.flush_cache()
+                pages[position] = page._replace(text=text, needs_ocr=needs_ocr(text, page.image_coverage))
+    return pages
+
+
+def _analyze_range(file_path: str, engine: str, start: int, stop: Optional[int]) -> List[PageText]:
+    if engine == "pymupdf":
+        return _analyze_pymupdf(file_path, start, stop)
+    return _analyze_pdfplumber(file_path, start, stop)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def analyze_pdf_pages(file_path: str, engine: Optional[str] = None, parallel: Optional[bool] = None) -> List[PageText]:
     """
-    Faster PDF text extraction using pdfplumber.
-    Avoids repeated string concatenation by collecting page texts in a list.
+    Text layer of every PDF page plus whether the page should be OCRed.
+    Pages that need OCR keep whatever text they had, for when OCR fails.
     """
-    logger.info(f"Starting PDF text extraction for: {file_path}")
+    engine = _engine(engine)
+    logger.info(f"Analyzing PDF pages for: {file_path} ({engine})")
     try:
-        with pdfplumber.open(file_path) as pdf:
-            # Collect all page texts in a list
-            pages_text = [page.extract_text() or "" for page in pdf.pages]
-        text = "\n".join(pages_text).strip()
-        logger.info(f"Completed PDF text extraction for: {file_path}")
-        logger.debug(f"Extracted text length: {len(text)}")
-        return text
+        count = _page_count(file_path, engine)
+        if parallel is None:
+            parallel = PDF_PARALLEL_PAGES > 0 and count >= PDF_PARALLEL_PAGES
+        if parallel and PDF_PARSE_PROCESSES > 1 and count > 1:
+            step = -(-count // PDF_PARSE_PROCESSES)
+            futures = [
+                _parse_pool().submit(_analyze_range, file_path, engine, start, min(start + step, count))
+                for start in range(0, count, step)
+            ]
+            pages = [page for future in futures for page in future.result()]
+        else:
+            pages = _analyze_range(file_path, engine, 0, None)
     except Exception as e:
-        logger.error(f"Failed to extract text from PDF {file_path}: {e}")
-        return ""
+        logger.error(f"Failed to analyze PDF {file_path}: {e}")
+        return []
+    scanned = sum(p.needs_ocr for p in pages)
+    logger.info(f"{file_path}: {len(pages) - scanned} text pages, {scanned} pages need OCR")
+    return pages
+
+
+def merge_pages(pages: List[PageText], ocr_texts: dict) -> str:
+    """Page texts in order, with OCR output in place of scanned pages."""
+    texts = []
+    for page in pages:
+        text = ocr_texts.get(page.index) if page.needs_ocr else None
+        texts.append(text if text and text.strip() else page.text)
+    return "\n".join(texts).strip()
+
+
+def extract_text_pdf(file_path: str) -> str:
+    """
+    Text layer of a PDF with the configured engine (PyMuPDF fast path,
+    pdfplumber for table-heavy pages). Scanned pages are not OCRed here.
+    """
+    logger.info(f"Starting PDF text extraction for: {file_path}")
+    text = "\n".join(page.text for page in analyze_pdf_pages(file_path)).strip()
+    logger.info(f"Completed PDF text extraction for: {file_path}")
+    logger.debug(f"Extracted text length: {len(text)}")
+    return text
 
 
 def extract_text_docx(file_path: str) -> str:
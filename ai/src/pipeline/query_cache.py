@@ -0,0 +1,52 @@
+import os
+import logging
+import unicodedata
+from typing import Iterable, List
+import numpy as np
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Search phrases repeat a lot ("tender", department names), so query vectors
+# are cached by normalized text. QUERY_WARMUP_FILE (one query per line) and
+# QUERY_WARMUP (comma separated) are encoded at startup.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", str(24 * 3600)))
+QUERY_WARMUP_FILE = os.getenv("QUERY_WARMUP_FILE")
+QUERY_WARMUP = os.getenv("QUERY_WARMUP", "")
+
+QUERY_CACHE = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, name="query")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share an entry."""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+async def embed_query(query: str, batcher) -> np.ndarray:
+    key = normalize_query(query)
+    vector = QUERY_CACHE.get(key)
+    if vector is None:
+        vector = (await batcher.encode([key]))[0]
+        QUERY_CACHE.set(key, vector)
+    return vector
+
+
+def warmup_queries() -> List[str]:
+    queries = [q for q in QUERY_WARMUP.split(",") if q.strip()]
+    if QUERY_WARMUP_FILE and os.path.exists(QUERY_WARMUP_FILE):
+        with open(QUERY_WARMUP_FILE, encoding="utf-8") as f:
+            queries.extend(line for line in f if line.strip())
+    return queries
+
+
+async def warm_up(batcher, queries: Iterable[str]) -> int:
+    """Pre-encode frequent queries in one batch; returns how many were added."""
+    keys = list(dict.fromkeys(normalize_query(q) for q in queries if q.strip()))
+    if not keys:
+        return 0
+    vectors = await batcher.encode(keys)
+    for key, vector in zip(keys, vectors):
+        QUERY_CACHE.set(key, vector)
+    logger.info(f"Warmed query cache with {len(keys)} queries")
+    return len(keys)
@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Optional
+from pipeline import backends, embeddings, llm_client
+from utils import metrics
+from utils.cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Finished /process results keyed by the upload's sha256, so re-uploads of
+# the same bytes skip extraction, models and LLM calls. Records are
+# zlib-compressed in SQLite and evicted least-recently-used beyond
+# RESULT_CACHE_MAX_MB. The key includes a pipeline version: bump
+# PIPELINE_VERSION (or change a model/backend setting) to invalidate.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB", "data/results.db")
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "0")) or None
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "1")
+
+RESULT_CACHE_REQUESTS = metrics.counter("result_cache_requests_total", "Result cache lookups", ["outcome"])
+
+
+def pipeline_version(stages) -> str:
+    """Short hash of everything that changes what /process returns."""
+    parts = {
+        "version": PIPELINE_VERSION,
+        "stages": stages,
+        "classify_backend": backends.CLASSIFY_BACKEND,
+        "embed_backend": backends.EMBED_BACKEND,
+        "embed_chunks": [embeddings.CHUNK_TOKENS, embeddings.CHUNK_OVERLAP, embeddings.CHUNK_DTYPE],
+        "llm_model": llm_client.LLM_MODEL,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class ResultCache:
+    """Content-addressed store of /process responses."""
+
+    def __init__(self, version: str, path: str = RESULT_CACHE_DB, max_mb: float = RESULT_CACHE_MAX_MB):
+        self.version = version
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.store = SQLiteStore(
+            path,
+            table="results",
+            ttl=RESULT_CACHE_TTL,
+            compress=True,
+            max_bytes=int(max_mb * 1024 * 1024),
+        )
+
+    def _key(self, content_hash: str) -> str:
+        return f"{self.version}:{content_hash}"
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        try:
+            result = self.store.get(self._key(content_hash))
+        except Exception as e:
+            logger.error(f"Result cache read failed: {e}")
+            result = None
+        RESULT_CACHE_REQUESTS.inc(outcome="hit" if result is not None else "miss")
+        return result
+
+    def set(self, content_hash: str, result: dict) -> None:
+        try:
+            self.store.set(self._key(content_hash), result)
+        except Exception as e:
+            logger.error(f"Result cache write failed: {e}")
+
+    def stats(self) -> dict:
+        return {"version": self.version, **self.store.stats()}
+
+    def close(self) -> None:
+        self.store.close()
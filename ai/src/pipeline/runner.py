@@ -0,0 +1,194 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from pipeline import parser, ocr, translate, embeddings, vector_store, result_cache
+from pipeline.batcher import EmbeddingBatcher
+from pipeline.graph import STAGE_LATENCY
+from pipeline.stages import build_default_graph
+from utils import metrics
+from utils.executor import StageExecutor
+from utils.uploads import SavedUpload
+
+logger = logging.getLogger(__name__)
+
+PAGES_PROCESSED = metrics.counter("pages_processed_total", "Document pages read", ["method"])
+CHARACTERS_EXTRACTED = metrics.counter("characters_extracted_total", "Characters of extracted text", ["type"])
+
+
+@contextmanager
+def _timed(stage: str, timings: Optional[Dict[str, float]]):
+    """Record a pre-graph step under the same histogram as the graph stages."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=stage, outcome=outcome)
+        if timings is not None:
+            timings[stage] = round(elapsed, 4)
+
+
+class DocumentPipeline:
+    """
+    Everything /process does for one document: text extraction, language
+    detection, translation and the stage graph, with the result cache in
+    front. Shared by the API process and the job queue workers.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[StageExecutor] = None,
+        use_cache: bool = result_cache.RESULT_CACHE_ENABLED,
+        stage_retries: int = 0,
+    ):
+        self.executor = executor or StageExecutor()
+        # Concurrent encode calls (search queries, document chunks) share model batches
+        self.batcher = EmbeddingBatcher(embeddings.embed_text, self.executor)
+        # Post-translation stages; add_stage() on this graph plugs in new outputs
+        self.graph = build_default_graph(self.executor, self.batcher, stage_retries=stage_retries)
+        # Finished results by upload hash; the version covers the stages and models
+        self.results_cache = (
+            result_cache.ResultCache(result_cache.pipeline_version(self.graph.describe()))
+            if use_cache
+            else None
+        )
+
+    async def extract_text(self, filename: str, file_path: str) -> str:
+        executor = self.executor
+        text = ""
+        if filename.endswith(".pdf"):
+            logger.info("Extracting text from PDF")
+            # Pages with a usable text layer are parsed; only scanned pages are OCRed
+            pages = await executor.run("parse", parser.analyze_pdf_pages, file_path)
+            scanned = [page.index for page in pages if page.needs_ocr]
+            ocr_texts = {}
+            if scanned:
+                logger.info(f"Running OCR on {len(scanned)} of {len(pages)} pages")
+                ocr_texts = await executor.run("ocr", ocr.extract_text_from_pages, file_path, scanned)
+            text = parser.merge_pages(pages, ocr_texts)
+            PAGES_PROCESSED.inc(len(pages) - len(scanned), method="text")
+            PAGES_PROCESSED.inc(len(scanned), method="ocr")
+            if not pages:  # unreadable by the parser; OCR the whole file
+                logger.info("PDF page analysis failed, falling back to OCR")
+                text = await executor.run("ocr", ocr.extract_text_from_file, file_path)  # type: ignore
+            kind = "pdf"
+        elif filename.endswith(".docx"):
+            logger.info("Extracting text from DOCX")
+            text = await executor.run("parse", parser.extract_text_docx, file_path)
+            kind = "docx"
+        else:
+            logger.info("Extracting text using OCR from image")
+            text = await executor.run("ocr", ocr.extract_text_from_file, file_path)  # type: ignore
+            PAGES_PROCESSED.inc(method="ocr")
+            kind = "image"
+        CHARACTERS_EXTRACTED.inc(len(text), type=kind)
+        return text
+
+    async def cached(self, sha256: str, filename: str, document_id: str) -> Optional[dict]:
+        """Stored result for these bytes, re-labelled for this upload, or None."""
+        if self.results_cache is None:
+            return None
+        cached = await self.executor.run("result_cache", self.results_cache.get, sha256)
+        if cached is None:
+            return None
+        logger.info(f"Serving cached result for {filename}")
+        result = {**cached, "file_name": filename, "document_id": document_id}
+        # A cached document uploaded under a new id still needs its vector indexed
+        store = vector_store.get_store()
+        vector = result.get("embedding_vector")
+        if vector and not store.read_only and document_id not in store:
+            await self.executor.run("index", store.upsert, document_id, vector)
+            result["vector_indexed"] = True
+        return result
+
+    async def store(self, sha256: str, result: dict) -> None:
+        # Fallback outputs (LLM down) must not outlive the outage in the cache
+        if self.results_cache is not None and "error" not in result and not result.get("degraded"):
+            await self.executor.run("result_cache", self.results_cache.set, sha256, result)
+
+    async def process(
+        self,
+        upload: SavedUpload,
+        document_id: str,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> dict:
+        """
+        Run the full pipeline on a saved upload (no cache lookup).
+        on_event(key, value) receives each field of the result as soon as it
+        is known, for streaming responses; timings collects seconds per step.
+        """
+        emit = on_event or (lambda key, value: None)
+
+        # --- Text Extraction (straight from the spooled upload) ---
+        with _timed("extract_text", timings):
+            text = await self.extract_text(upload.filename, upload.path)
+        emit("original_text", text)
+
+        # --- Check if any text was extracted ---
+        if not text.strip():
+            logger.info("No text could be extracted from this document.")
+            return {
+                "file_name": upload.filename,
+                "error": "No text could be extracted from this document.",
+            }
+
+        # --- Language Detection ---
+        # One context per request: every text is detected and translated once
+        translation = translate.TranslationContext()
+        with _timed("detect_language", timings):
+            detected_lang = translation.detect(text)
+        logger.info(f"Detected language: {detected_lang}")
+        emit("detected_language", detected_lang)
+
+        # --- Translation (if not English) ---
+        translated_text = text
+        if detected_lang != "en" and detected_lang != "unknown":
+            logger.info("Translating text to English")
+            with _timed("translate", timings):
+                translated_text = await translation.to_english(text, detected_lang)
+        else:
+            logger.info("No translation needed")
+        emit("translated_text", translated_text)
+
+        # --- Classification, metadata, embeddings and summaries (concurrent) ---
+        # Outputs that fell back (failed optional stages, LLM fallbacks) are
+        # collected in degraded
+        degraded = set()
+        results = await self.graph.run(
+            {
+                "document_id": document_id,
+                "text": text,
+                "detected_language": detected_lang,
+                "translated_text": translated_text,
+                "translation": translation,
+                "degraded": degraded,
+            },
+            on_stage=on_event,
+            timings=timings,
+            failed=degraded,
+        )
+        degraded.update(f"translation_{lang}" for lang in translation.fallbacks)
+
+        # --- Return structured response ---
+        result = {
+            "file_name": upload.filename,
+            "document_id": document_id,
+            "detected_language": detected_lang,
+            "original_text": text,
+            "translated_text": translated_text,
+            **results,
+        }
+        if degraded:
+            result["degraded"] = sorted(degraded)
+            emit("degraded", result["degraded"])
+        return result
+
+    async def close(self) -> None:
+        await self.batcher.close()
+        self.executor.shutdown()
+        if self.results_cache is not None:
+            self.results_cache.close()
@@ -0,0 +1,106 @@
+import logging
+import time
+from pipeline import classify, metadata, embeddings, summarize, vector_store
+from pipeline.graph import StageGraph
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CLASSIFY_DECISIONS = metrics.counter(
+    "classify_decisions_total", "Documents classified, by deciding tier", ["tier"]
+)
+CLASSIFY_LATENCY = metrics.histogram("classify_seconds", "Classification latency by deciding tier", ["tier"])
+CLASSIFY_SAVED = metrics.counter(
+    "classify_seconds_saved_total", "Estimated zero-shot time avoided by the embedding tier and cache"
+)
+
+
+def _zero_shot_avg() -> float:
+    for item in CLASSIFY_LATENCY.snapshot():
+        if item["labels"].get("tier") == "zero_shot":
+            return item["avg"]
+    return 0.0
+
+
+def build_default_graph(executor, batcher, stage_retries: int = 0) -> StageGraph:
+    """
+    Stages that run once the document text is known.
+    Expects "document_id", "text", "detected_language", "translated_text",
+    the request's translate.TranslationContext ("translation") and a set of
+    degraded outputs ("degraded") in the context;
+    the only chain is summary_en -> summary_ml, everything else runs in parallel.
+    """
+    graph = StageGraph(stage_retries=stage_retries)
+
+    async def classification(ctx):
+        logger.info("Classifying document")
+        doc = ctx["_document_embedding"]
+        prototypes = await classify.department_prototypes(batcher)
+        started = time.perf_counter()
+        result = await executor.run(
+            "classify",
+            classify.classify_doc,
+            ctx["translated_text"],
+            doc["vector"],
+            prototypes,
+            doc["chunk_vectors"],
+            doc["offsets"],
+        )
+        # Recorded here rather than in classify_doc so process-pool workers count too
+        elapsed = time.perf_counter() - started
+        tier = result.get("tier", "zero_shot")
+        CLASSIFY_DECISIONS.inc(tier=tier)
+        if tier in ("embedding", "cache"):
+            CLASSIFY_SAVED.inc(max(_zero_shot_avg() - elapsed, 0.0))
+        CLASSIFY_LATENCY.observe(elapsed, tier=tier)
+        return result
+
+    async def extract_metadata(ctx):
+        logger.info("Extracting metadata")
+        return await executor.run("metadata", metadata.extract_metadata, ctx["translated_text"])
+
+    async def document_embedding(ctx):
+        logger.info("Generating chunk embeddings")
+        texts, offsets = embeddings.split_document(ctx["translated_text"])
+        vectors = await batcher.encode(texts)
+        return embeddings.pool_document(offsets, vectors)
+
+    async def embedding_vector(ctx):
+        # Pooled document vector, kept for callers that store a single vector
+        return ctx["_document_embedding"]["vector"].tolist()
+
+    async def chunk_embeddings(ctx):
+        doc = ctx["_document_embedding"]
+        return embeddings.encode_chunks(doc["offsets"], doc["chunk_vectors"])
+
+    async def vector_indexed(ctx):
+        # Keep the local vector store in sync so /rag_search can rank documents
+        store = vector_store.get_store()
+        if store.read_only:
+            return False
+        await executor.run("index", store.upsert, ctx["document_id"], ctx["embedding_vector"])
+        return True
+
+    async def summary_en(ctx):
+        logger.info("Summarizing text")
+        # translated_text already is the English text; no second translation
+        try:
+            return await summarize.summarize_text(ctx["translated_text"], fallback=False)
+        except Exception:
+            # Still answer, but keep the extract-based summary out of the result cache
+            ctx["degraded"].add("summary_en")
+            return summarize.fallback_summary(ctx["translated_text"])
+
+    async def summary_ml(ctx):
+        logger.info("Translating English summary to Malayalam")
+        return await ctx["translation"].to_malayalam(ctx["summary_en"])
+
+    graph.add_stage("classification", classification, deps=("translated_text", "_document_embedding"))
+    graph.add_stage("metadata", extract_metadata, deps=("translated_text",))
+    graph.add_stage("_document_embedding", document_embedding, deps=("translated_text",))
+    graph.add_stage("embedding_vector", embedding_vector, deps=("_document_embedding",))
+    graph.add_stage("chunk_embeddings", chunk_embeddings, deps=("_document_embedding",))
+    graph.add_stage("vector_indexed", vector_indexed, deps=("embedding_vector", "document_id"), optional=True)
+    graph.add_stage("summary_en", summary_en, deps=("translated_text",))
+    graph.add_stage("summary_ml", summary_ml, deps=("summary_en", "translation"), optional=True)
+    return graph
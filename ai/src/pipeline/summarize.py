@@ -1,16 +1,36 @@
 import os
-import requests
+import asyncio
+import hashlib
 import logging
+from starlette.concurrency import run_in_threadpool
+from pipeline import llm_client
+from utils.cache import SQLiteStore, TTLCache
+from utils.chunking import chunk_text, estimate_tokens
 
 logger = logging.getLogger(__name__)
-GROQ_API_KEY = "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"
 
+# Documents larger than SUMMARY_CHUNK_TOKENS are summarized map-reduce style:
+# chunks are summarized in parallel (at most SUMMARY_CONCURRENCY at once) and
+# the partial summaries are reduced until they fit into one final request.
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+PARTIAL_LINES = int(os.getenv("SUMMARY_PARTIAL_LINES", "8"))
 
-def summarize_with_groq(text, language="en", max_lines=30):
-    """
-    Summarizes the given text using GROQ API.
-    Produces a clean, structured paragraph limited to max_lines.
-    """
+# Partial summaries keyed by chunk hash, so an edited document only
+# re-summarizes the chunks that changed. SUMMARY_CACHE_DB persists them.
+CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_DB = os.getenv("SUMMARY_CACHE_DB")
+
+SUMMARY_CACHE = TTLCache(
+    maxsize=CACHE_SIZE,
+    ttl=CACHE_TTL,
+    store=SQLiteStore(CACHE_DB, table="summaries", ttl=CACHE_TTL) if CACHE_DB else None,
+    name="summary",
+)
+
+
+async def _request_summary(text, language, max_lines):
     system_prompt = (
         f"You are an expert summarization assistant that produces concise, readable summaries in {language}. "
         "Ignore headers, page numbers, repetitive phrases, and administrative text."
@@ -21,31 +41,66 @@ def summarize_with_groq(text, language="en", max_lines=30):
         f"Limit the summary to approximately {max_lines} lines:\n{text}"
     )
 
-    payload = {
-        "model": "llama-3.1-8b-instant",
-        "messages": [
+    return await llm_client.chat_completion(
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        "temperature": 0.1,
-        "max_tokens": 2048,
-        "stream": False,
-    }
+        max_tokens=2048,
+    )
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
 
-    try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=30,
+async def _cached_summary(text, language, max_lines, semaphore):
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    key = f"{language}:{max_lines}:{digest}"
+    # The cache may be backed by SQLite; keep its I/O off the event loop
+    cached = await run_in_threadpool(SUMMARY_CACHE.get, key)
+    if cached is not None:
+        return cached
+    async with semaphore:
+        summary = await _request_summary(text, language, max_lines)
+    await run_in_threadpool(SUMMARY_CACHE.set, key, summary)
+    return summary
+
+
+async def _map_reduce(text, language, max_lines, semaphore):
+    """Summarize chunks in parallel, then reduce the partials level by level."""
+    level = 0
+    while estimate_tokens(text) > CHUNK_TOKENS:
+        chunks = chunk_text(text, CHUNK_TOKENS)
+        logger.info(f"Summarizing {len(chunks)} chunks (level {level})")
+        partials = await asyncio.gather(
+            *(_cached_summary(c.text, language, PARTIAL_LINES, semaphore) for c in chunks)
         )
-        response.raise_for_status()
-        summary = response.json()["choices"][0]["message"]["content"]
+        reduced = "\n\n".join(p.strip() for p in partials)
+        if len(reduced) >= len(text):
+            # The model is not shrinking the text; summarize what fits in one
+            # request rather than overflowing the context window
+            logger.warning(f"Partial summaries did not shrink at level {level}; truncating to one chunk")
+            text = chunks[0].text
+            break
+        text = reduced
+        level += 1
+    return await _cached_summary(text, language, max_lines, semaphore)
+
+
+def fallback_summary(text, max_lines=30):
+    """First max_lines non-empty lines, used when the LLM is unavailable."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return " ".join(lines[:max_lines])
+
+
+async def summarize_with_groq(text, language="en", max_lines=30, fallback=True):
+    """
+    Summarizes the given text using the shared LLM client (GROQ by default).
+    Large documents are summarized hierarchically (map-reduce).
+    Produces a clean, structured paragraph limited to max_lines.
+    With fallback=False LLM failures are raised instead of answered with
+    fallback_summary(), so callers can tell a degraded result apart.
+    """
+    try:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        summary = await _map_reduce(text, language, max_lines, semaphore)
 
         # Remove any repeated prepended phrases
         summary = summary.replace("Here's a summary of the text:", "")
@@ -64,12 +119,11 @@ def summarize_with_groq(text, language="en", max_lines=30):
         return limited_summary.strip()
     except Exception as e:
         logger.error(f"summarization failed: {e}")
-        # fallback
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        fallback_summary = " ".join(lines[:max_lines])
-        return fallback_summary
+        if not fallback:
+            raise
+        return fallback_summary(text, max_lines)
 
 
-def summarize_text(text, language="en"):
-    print("Starting summarization...")
-    return summarize_with_groq(text, language=language)
+async def summarize_text(text, language="en", fallback=True):
+    logger.info(f"Summarizing {len(text)} characters")
+    return await summarize_with_groq(text, language=language, fallback=fallback)
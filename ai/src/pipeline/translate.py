@@ -1,104 +1,188 @@
 import os
+import asyncio
+import hashlib
 import logging
-import requests
+import threading
+from typing import Dict, Optional, Set, Tuple
 from langdetect import detect
+from starlette.concurrency import run_in_threadpool
+from pipeline import llm_client
+from utils.cache import SQLiteStore, TTLCache
+from utils.chunking import chunk_text, reassemble
+from utils.langdetect_utils import detect_language
 
 logger = logging.getLogger(__name__)
 
-GROQ_API_KEY = "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"
+# Long documents are split on paragraph/sentence boundaries into chunks of
+# ~TRANSLATION_CHUNK_TOKENS and translated concurrently, at most
+# TRANSLATION_CONCURRENCY chunks in flight per document.
+CHUNK_TOKENS = int(os.getenv("TRANSLATION_CHUNK_TOKENS", "1000"))
+CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+# Malayalam needs several times more tokens than the English source
+MAX_OUTPUT_TOKENS = int(os.getenv("TRANSLATION_MAX_OUTPUT_TOKENS", "4096"))
 
-def translate_to_english(text: str) -> str:
+# Content-hash keyed translation cache (per chunk), optionally persisted to
+# SQLite so re-uploads of the same document skip the LLM round-trip after a restart.
+CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_DB = os.getenv("TRANSLATION_CACHE_DB")
+
+TRANSLATION_CACHE = TTLCache(
+    maxsize=CACHE_SIZE,
+    ttl=CACHE_TTL,
+    store=SQLiteStore(CACHE_DB, table="translations", ttl=CACHE_TTL) if CACHE_DB else None,
+    name="translation",
+)
+
+LANGUAGE_NAMES = {"en": "English", "ml": "Malayalam"}
+
+
+def _cache_key(text: str, target_lang: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{target_lang}:{digest}"
+
+
+async def _request_translation(text: str, target_lang: str) -> str:
+    """
+    Translate a single chunk through the LLM backend. Raises on failure so
+    that fallbacks (the original text) never end up in the cache.
+    """
+    language = LANGUAGE_NAMES[target_lang]
+    clean_text = text.replace("”", "").replace("“", "").replace("‌", "")
+    system_prompt = f"You are a translation assistant that translates text to {language}."
+    user_prompt = f"Translate the following text to {language}:\n{clean_text}"
+
+    translated_text = await llm_client.chat_completion(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=MAX_OUTPUT_TOKENS,
+    )
+    # Remove any prepended phrase like "Here's the translation of the given text to English:"
+    remove_prefix = f"Here's the translation of the given text to {language}:\n\n"
+    if translated_text.startswith(remove_prefix):
+        translated_text = translated_text[len(remove_prefix):].strip()
+    logger.debug(f"Translated {len(text)} characters to {len(translated_text)} ({target_lang})")
+    return translated_text
+
+
+async def _translate_chunk(text: str, target_lang: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+    """Translated chunk, or None when the LLM call failed."""
+    key = _cache_key(text, target_lang)
+    # The cache may be backed by SQLite; keep its I/O off the event loop
+    cached = await run_in_threadpool(TRANSLATION_CACHE.get, key)
+    if cached is not None:
+        return cached
+
+    async with semaphore:
+        try:
+            translated_text = await _request_translation(text, target_lang)
+        except Exception as e:
+            logger.error(f"LLM translation failed for chunk: {e}")
+            return None
+
+    await run_in_threadpool(TRANSLATION_CACHE.set, key, translated_text)
+    return translated_text
+
+
+async def _translate_checked(
+    text: str, target_lang: str, source_lang: Optional[str] = None
+) -> Tuple[str, bool]:
+    """
+    Translate text to target_lang, skipping detection when source_lang is known.
+    Chunks that fail to translate fall back to their original text; the flag
+    is False when that happened.
+    """
+    if source_lang is None:
+        try:
+            source_lang = detect(text)
+            logger.info(f"Detected language: {source_lang}")
+        except Exception as e:
+            logger.error(f"Language detection failed: {e}")
+            return text, False
+
+    if source_lang == target_lang or len(text.strip()) < 3:
+        return text, True
+
+    chunks = chunk_text(text, CHUNK_TOKENS)
+    logger.info(f"Translating {len(chunks)} chunk(s) to {target_lang}")
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    outputs = await asyncio.gather(
+        *(_translate_chunk(chunk.text, target_lang, semaphore) for chunk in chunks)
+    )
+    complete = all(output is not None for output in outputs)
+    outputs = [chunk.text if output is None else output for chunk, output in zip(chunks, outputs)]
+    return reassemble(text, chunks, outputs), complete
+
+
+async def _translate(text: str, target_lang: str, source_lang: Optional[str] = None) -> str:
+    translated, _ = await _translate_checked(text, target_lang, source_lang)
+    return translated
+
+
+async def translate_to_english(text: str, source_lang: Optional[str] = None) -> str:
     """
-    Translates input text to English using the GROQ Chat Completions API.
+    Translates input text to English using the LLM Chat Completions API.
     Falls back to original text if translation fails.
     """
-    try:
-        detected_lang = detect(text)
-        logger.info(f"Detected language: {detected_lang}")
-    except Exception as e:
-        logger.error(f"Language detection failed: {e}")
-        return text
-
-    if detected_lang == "en" or len(text.strip()) < 3:
-        return text
-
-    try:
-        clean_text = text.replace("”", "").replace("“", "").replace("‌", "")
-        system_prompt = "You are a translation assistant that translates text to English."
-        user_prompt = f"Translate the following text to English:\n{clean_text}"
-
-        payload = {
-            "model": "llama-3.1-8b-instant",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 2048,
-            "stream": False
-        }
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", json=payload, headers=headers)
-        response.raise_for_status()
-        translated_text = response.json()["choices"][0]["message"]["content"]
-        # Remove any prepended phrase like "Here's the translation of the given text to English:"
-        remove_prefix = "Here's the translation of the given text to English:\n\n"
-        if translated_text.startswith(remove_prefix):
-            translated_text = translated_text[len(remove_prefix):].strip()
-        logger.info(f"Translation result: {translated_text}")
-        return translated_text
-    except Exception as e:
-        logger.error(f"GROQ API translation failed: {e}")
-        return text
-
-def translate_to_malayalam(text: str) -> str:
+    return await _translate(text, "en", source_lang)
+
+
+async def translate_to_malayalam(text: str, source_lang: Optional[str] = None) -> str:
     """
-    Translates input text to Malayalam using the GROQ Chat Completions API.
+    Translates input text to Malayalam using the LLM Chat Completions API.
     Falls back to original text if translation fails.
     """
-    try:
-        detected_lang = detect(text)
-        logger.info(f"Detected language: {detected_lang}")
-    except Exception as e:
-        logger.error(f"Language detection failed: {e}")
-        return text
-
-    if detected_lang == "ml" or len(text.strip()) < 3:
-        return text
-
-    try:
-        clean_text = text.replace("”", "").replace("“", "").replace("‌", "")
-        system_prompt = "You are a translation assistant that translates text to Malayalam."
-        user_prompt = f"Translate the following text to Malayalam:\n{clean_text}"
-
-        payload = {
-            "model": "llama-3.1-8b-instant",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 2048,
-            "stream": False
-        }
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", json=payload, headers=headers)
-        response.raise_for_status()
-        translated_text = response.json()["choices"][0]["message"]["content"]
-        # Remove any prepended phrase like "Here's the translation of the given text to Malayalam:"
-        remove_prefix = "Here's the translation of the given text to Malayalam:\n\n"
-        if translated_text.startswith(remove_prefix):
-            translated_text = translated_text[len(remove_prefix):].strip()
-        logger.info(f"Translation result: {translated_text}")
-        return translated_text
-    except Exception as e:
-        logger.error(f"GROQ API translation failed: {e}")
-        return text
\ No newline at end of file
+    return await _translate(text, "ml", source_lang)
+
+
+class TranslationContext:
+    """
+    Per-request memo of language detection and translation results, so each
+    distinct text is detected and translated at most once across stages.
+    Target languages whose translation fell back to source text are kept in
+    fallbacks, so the request's result is not cached as complete.
+    """
+
+    def __init__(self):
+        self._languages: Dict[str, str] = {}
+        self._translations: Dict[str, str] = {}
+        self.fallbacks: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def detect(self, text: str) -> str:
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._languages:
+                return self._languages[key]
+        try:
+            lang = detect_language(text)
+        except Exception as e:
+            logger.error(f"Language detection failed: {e}")
+            lang = "unknown"
+        with self._lock:
+            self._languages[key] = lang
+        return lang
+
+    async def translate(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> str:
+        key = _cache_key(text, target_lang)
+        with self._lock:
+            if key in self._translations:
+                return self._translations[key]
+        if source_lang is None:
+            source_lang = self.detect(text)
+        if source_lang == "unknown":
+            return text
+        result, complete = await _translate_checked(text, target_lang, source_lang)
+        with self._lock:
+            self._translations[key] = result
+            if not complete:
+                self.fallbacks.add(target_lang)
+        return result
+
+    async def to_english(self, text: str, source_lang: Optional[str] = None) -> str:
+        return await self.translate(text, "en", source_lang)
+
+    async def to_malayalam(self, text: str, source_lang: Optional[str] = None) -> str:
+        return await self.translate(text, "ml", source_lang)
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Document vectors live on disk as a FAISS index plus a JSON id map.
+# "flat" is exact search; "ivf" and "hnsw" trade a little recall for speed
+# on large corpora. With VECTOR_INDEX_MMAP=1 the index file is memory-mapped
+# read-only, which suits search-only replicas and job workers; they reload it
+# when the writer replaces the files (checked every VECTOR_RELOAD_SECONDS).
+# Exactly one process may write an index file. Writes are flushed to disk
+# after VECTOR_SAVE_EVERY changes or VECTOR_SAVE_SECONDS, whichever comes
+# first, and by flush()/save() (periodically and at shutdown in the API).
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "data/vectors.faiss")
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "0") == "1"
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "768"))
+VECTOR_SAVE_EVERY = int(os.getenv("VECTOR_SAVE_EVERY", "100"))
+VECTOR_SAVE_SECONDS = float(os.getenv("VECTOR_SAVE_SECONDS", "30"))
+VECTOR_RELOAD_SECONDS = float(os.getenv("VECTOR_RELOAD_SECONDS", "5"))
+IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "256"))
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype="float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class VectorStore:
+    """
+    Document id -> vector index with cosine-similarity search.
+    Only document embeddings are added here; queries are never indexed.
+    """
+
+    def __init__(
+        self,
+        path: str = VECTOR_INDEX_PATH,
+        dim: int = VECTOR_DIM,
+        index_type: str = VECTOR_INDEX_TYPE,
+        mmap: bool = VECTOR_INDEX_MMAP,
+    ):
+        self.path = path
+        self.ids_path = path + ".ids.json"
+        self.dim = dim
+        self.index_type = index_type
+        self.read_only = mmap
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._saved_at = time.monotonic()
+        self._checked_at = time.monotonic()
+        self._file_version = self._version_on_disk()
+        self._doc_to_id: Dict[str, int] = {}
+        self._id_to_doc: Dict[int, str] = {}
+        self._next_id = 0
+        if os.path.exists(path):
+            self.index = self._load()
+        else:
+            # IVF starts out exact and is trained once enough vectors arrive
+            self.index = self._new_index(self._base_for_type("flat" if index_type == "ivf" else index_type))
+
+    # --- index construction ---
+
+    def _base_for_type(self, index_type: str):
+        if index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efSearch = HNSW_EF_SEARCH
+            return base
+        if index_type == "ivf":
+            # index_factory makes the IVF index own its quantizer
+            base = faiss.index_factory(self.dim, f"IVF{IVF_NLIST},Flat", faiss.METRIC_INNER_PRODUCT)
+            base.nprobe = IVF_NPROBE
+            return base
+        return faiss.IndexFlatIP(self.dim)
+
+    def _new_index(self, base):
+        if isinstance(base, faiss.IndexIVF):
+            # IVF stores ids natively; the hashtable direct map enables
+            # reconstruct() and remove_ids() by document vector id
+            base.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return base
+        return faiss.IndexIDMap2(base)
+
+    def _current_type(self) -> str:
+        if isinstance(self.index, faiss.IndexIVF):
+            return "ivf"
+        if isinstance(faiss.downcast_index(self.index.index), faiss.IndexHNSWFlat):
+            return "hnsw"
+        return "flat"
+
+    def _all_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.array(sorted(self._id_to_doc), dtype="int64")
+        if len(ids) == 0:
+            return ids, np.zeros((0, self.dim), dtype="float32")
+        vectors = np.vstack([self.index.reconstruct(int(i)) for i in ids]).astype("float32")
+        return ids, vectors
+
+    def _rebuild(self, index_type: str, exclude: Optional[set] = None):
+        """Rebuild the index as index_type from the stored vectors."""
+        ids, vectors = self._all_vectors()
+        if exclude:
+            keep = np.array([i not in exclude for i in ids], dtype=bool)
+            ids, vectors = ids[keep], vectors[keep]
+        base = self._base_for_type(index_type)
+        if index_type == "ivf":
+            base.train(vectors)
+        index = self._new_index(base)
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        self.index = index
+        logger.info(f"Rebuilt {index_type} vector index with {len(ids)} vectors")
+
+    def _maybe_upgrade(self):
+        # IVF needs enough vectors to train its centroids; stay exact until then
+        if self.index_type == "ivf" and self._current_type() == "flat":
+            if self.index.ntotal >= IVF_NLIST * 39:
+                self._rebuild("ivf")
+        elif self.index_type == "hnsw" and self._current_type() == "flat":
+            self._rebuild("hnsw")
+
+    # --- persistence ---
+
+    def _version_on_disk(self) -> Tuple[int, int]:
+        versions = []
+        for path in (self.path, self.ids_path):
+            try:
+                versions.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                versions.append(0)
+        return tuple(versions)
+
+    def _maybe_reload(self) -> None:
+        """Read-only copies pick up the writer's latest save (it replaces both files)."""
+        now = time.monotonic()
+        if not self.read_only or now - self._checked_at < VECTOR_RELOAD_SECONDS:
+            return
+        self._checked_at = now
+        version = self._version_on_disk()
+        if version == self._file_version or not os.path.exists(self.path):
+            return
+        with self._lock:
+            try:
+                self.index = self._load()
+            except Exception as e:
+                # Caught between the writer's two renames; the next check retries
+                logger.warning(f"Reloading vector index failed: {e}")
+                return
+            self._file_version = version
+
+    def _load(self):
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.read_only else 0
+        index = faiss.read_index(self.path, flags)
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path) as f:
+                state = json.load(f)
+            self._doc_to_id = state["ids"]
+            self._id_to_doc = {v: k for k, v in self._doc_to_id.items()}
+            self._next_id = state["next_id"]
+        logger.info(f"Loaded vector index {self.path} with {index.ntotal} vectors")
+        return index
+
+    def save(self):
+        if self.read_only:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Write to temp files and rename so a crash never leaves a torn index
+            faiss.write_index(self.index, self.path + ".tmp")
+            with open(self.ids_path + ".tmp", "w") as f:
+                json.dump({"next_id": self._next_id, "ids": self._doc_to_id}, f)
+            os.replace(self.path + ".tmp", self.path)
+            os.replace(self.ids_path + ".tmp", self.ids_path)
+            self._dirty = 0
+            self._saved_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Save if anything changed since the last save."""
+        if self._dirty:
+            self.save()
+
+    def _changed(self):
+        # Saving rewrites the whole index, so writes are batched
+        self._dirty += 1
+        if self._dirty >= VECTOR_SAVE_EVERY or time.monotonic() - self._saved_at >= VECTOR_SAVE_SECONDS:
+            self.save()
+
+    # --- public API ---
+
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return len(self._doc_to_id)
+
+    def __contains__(self, document_id: str) -> bool:
+        self._maybe_reload()
+        return document_id in self._doc_to_id
+
+    def upsert(self, document_id: str, vector) -> None:
+        if self.read_only:
+            raise RuntimeError("Vector store is memory-mapped read-only")
+        vectors = _normalize(vector)
+        with self._lock:
+            if document_id in self._doc_to_id:
+                self._remove_locked(document_id)
+            vid = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(vectors, np.array([vid], dtype="int64"))
+            self._doc_to_id[document_id] = vid
+            self._id_to_doc[vid] = document_id
+            self._maybe_upgrade()
+            self._changed()
+
+    def _remove_locked(self, document_id: str) -> None:
+        vid = self._doc_to_id[document_id]
+        if self._current_type() == "hnsw":
+            # HNSW graphs do not support deletion
+            self._rebuild("hnsw", exclude={vid})
+        else:
+            self.index.remove_ids(np.array([vid], dtype="int64"))
+        del self._doc_to_id[document_id]
+        del self._id_to_doc[vid]
+
+    def remove(self, document_id: str) -> bool:
+        if self.read_only:
+            raise RuntimeError("Vector store is memory-mapped read-only")
+        with self._lock:
+            if document_id not in self._doc_to_id:
+                return False
+            self._remove_locked(document_id)
+            self._changed()
+            return True
+
+    def search(self, vector, top_k: int = 5) -> List[dict]:
+        query = _normalize(vector)
+        with self._lock:
+            self._maybe_reload()
+            if self.index.ntotal == 0:
+                return []
+            scores, ids = self.index.search(query, min(top_k, self.index.ntotal))
+            return [
+                {"document_id": self._id_to_doc[int(i)], "score": float(s)}
+                for s, i in zip(scores[0], ids[0])
+                if i != -1 and int(i) in self._id_to_doc
+            ]
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._doc_to_id),
+            "index_type": self._current_type(),
+            "configured_type": self.index_type,
+            "read_only": self.read_only,
+            "unsaved_changes": self._dirty,
+            "path": self.path,
+        }
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> VectorStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VectorStore()
+        return _store
+
+
+def use_read_only_store() -> VectorStore:
+    """Memory-map the index read-only in processes that must not write it (job workers)."""
+    global _store
+    with _store_lock:
+        _store = VectorStore(mmap=True)
+        return _store
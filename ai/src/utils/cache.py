@@ -0,0 +1,228 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = metrics.counter("cache_requests_total", "In-process cache lookups", ["cache", "outcome"])
+
+_MISSING = object()
+
+
+class SQLiteStore:
+    """
+    Small persistent key/value table with TTL and least-recently-used trimming.
+    Values are stored as JSON, so anything json.dumps accepts can be cached.
+    With compress=True values are zlib-compressed JSON; max_bytes bounds the
+    total stored value size in addition to max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        ttl: Optional[float] = None,
+        max_entries: int = 100_000,
+        compress: bool = False,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if "size" not in columns:
+            # Tables created before size accounting
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        self._conn.commit()
+
+    def _encode(self, value: Any):
+        data = json.dumps(value)
+        if self.compress:
+            return zlib.compress(data.encode("utf-8"))
+        return data
+
+    @staticmethod
+    def _decode(raw) -> Any:
+        if isinstance(raw, bytes):
+            return json.loads(zlib.decompress(raw))
+        return json.loads(raw)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return default
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return self._decode(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        encoded = self._encode(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, now, now, len(encoded)),
+            )
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            if self.max_bytes is not None:
+                self._trim_bytes(keep=key)
+            self._conn.commit()
+
+    def _trim_bytes(self, keep: str) -> None:
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evict = []
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                evict.append((key,))
+                total -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", evict)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache with per-entry TTL and hit/miss counters.
+    An optional SQLiteStore acts as a second tier that survives restarts.
+    Named caches also count lookups in cache_requests_total{cache=name}.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        store: Optional[SQLiteStore] = None,
+        name: Optional[str] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    self._count("hit")
+                    return value
+                del self._data[key]
+
+        if self.store is not None:
+            value = self.store.get(key, _MISSING)
+            if value is not _MISSING:
+                self._put(key, value)
+                with self._lock:
+                    self.hits += 1
+                self._count("store_hit")
+                return value
+
+        with self._lock:
+            self.misses += 1
+        self._count("miss")
+        return default
+
+    def _count(self, outcome: str) -> None:
+        if self.name is not None:
+            CACHE_REQUESTS.inc(cache=self.name, outcome=outcome)
+
+    def set(self, key: str, value: Any) -> None:
+        self._put(key, value)
+        if self.store is not None:
+            try:
+                self.store.set(key, value)
+            except Exception as e:
+                logger.error(f"Failed to persist cache entry: {e}")
+
+    def _put(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass
+from typing import List
+
+# Rough size of one LLM / transformer token in characters of English text
+CHARS_PER_TOKEN = 4
+
+# Split points: paragraph breaks first, then sentence ends (incl. the Devanagari danda)
+_BOUNDARY_RE = re.compile(r"\n\s*\n|(?<=[.!?।])\s+|\n")
+_WORD_RE = re.compile(r"\S+")
+
+
+@dataclass
+class Chunk:
+    text: str
+    start: int
+    end: int
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _units(text: str, max_chars: int) -> List[tuple]:
+    """Sentence/paragraph spans; over-long sentences are cut at word boundaries, over-long words anywhere."""
+    spans = []
+    pos = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        spans.append((pos, match.start()))
+        pos = match.end()
+    spans.append((pos, len(text)))
+
+    units = []
+    for start, end in spans:
+        # Trim surrounding whitespace but keep offsets into the original text
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            continue
+        if end - start <= max_chars:
+            units.append((start, end))
+            continue
+        piece_start = None
+        piece_end = None
+        for word in _WORD_RE.finditer(text, start, end):
+            word_start, word_end = word.span()
+            if piece_start is not None and word_end - piece_start > max_chars:
+                units.append((piece_start, piece_end))
+                piece_start = None
+            # A single word longer than max_chars (URLs, base64, unspaced
+            # scripts) is cut into max_chars slices
+            while word_end - word_start > max_chars:
+                units.append((word_start, word_start + max_chars))
+                word_start += max_chars
+            if piece_start is None:
+                piece_start = word_start
+            piece_end = word_end
+        if piece_start is not None:
+            units.append((piece_start, piece_end))
+    return units
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[Chunk]:
+    """
+    Split text into chunks of at most ~max_tokens, breaking on paragraph and
+    sentence boundaries. Each chunk keeps its character offsets into text, and
+    consecutive chunks may share up to overlap_tokens of trailing sentences.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    units = _units(text, max_chars)
+
+    chunks: List[Chunk] = []
+    current: List[tuple] = []
+    for unit in units:
+        if current and unit[1] - current[0][0] > max_chars:
+            chunks.append(Chunk(text[current[0][0]:current[-1][1]], current[0][0], current[-1][1]))
+            # Carry trailing units into the next chunk as overlap
+            carried: List[tuple] = []
+            if overlap_chars:
+                for prev in reversed(current):
+                    if unit[1] - prev[0] > max_chars or current[-1][1] - prev[0] > overlap_chars:
+                        break
+                    carried.insert(0, prev)
+            current = carried
+        current.append(unit)
+    if current:
+        chunks.append(Chunk(text[current[0][0]:current[-1][1]], current[0][0], current[-1][1]))
+    return chunks
+
+
+def reassemble(text: str, chunks: List[Chunk], outputs: List[str]) -> str:
+    """
+    Join per-chunk outputs in order, reusing the original whitespace between
+    non-overlapping chunks so paragraph breaks survive the round trip.
+    """
+    parts = []
+    prev_end = None
+    for chunk, output in zip(chunks, outputs):
+        if prev_end is not None:
+            gap = text[prev_end:chunk.start] if chunk.start >= prev_end else ""
+            parts.append(gap if gap else " ")
+        parts.append(output)
+        prev_end = chunk.end
+    return "".join(parts)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# "thread" keeps models shared in one process, "process" sidesteps the GIL at
+# the cost of every worker loading its own copy of the models.
+POOL_KIND = os.getenv("PIPELINE_POOL", "thread")
+MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", str(os.cpu_count() or 4)))
+IO_WORKERS = int(os.getenv("PIPELINE_IO_WORKERS", "16"))
+
+# Admission control: documents processed at once, documents allowed to wait
+# for a slot, and how long a waiting document may wait before being rejected.
+MAX_INFLIGHT = int(os.getenv("PIPELINE_MAX_INFLIGHT", "4"))
+MAX_QUEUED = int(os.getenv("PIPELINE_MAX_QUEUED", "16"))
+ADMISSION_TIMEOUT = float(os.getenv("PIPELINE_ADMISSION_TIMEOUT", "120"))
+
+# Stages that burn CPU (models, OCR, PDF parsing) go to the CPU pool;
+# everything else (blocking HTTP calls) goes to the I/O thread pool.
+CPU_STAGES = {"parse", "ocr", "classify", "metadata", "embeddings"}
+
+# Per-stage concurrency limits, overridable as "ocr=1,classify=2"
+DEFAULT_STAGE_LIMITS = {
+    "parse": 4,
+    "ocr": 1,
+    "classify": 2,
+    "metadata": 2,
+    "embeddings": 2,
+}
+
+
+def _parse_stage_limits(spec: Optional[str]) -> Dict[str, int]:
+    limits = dict(DEFAULT_STAGE_LIMITS)
+    if not spec:
+        return limits
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid stage limit: {item}")
+    return limits
+
+
+STAGE_LIMITS = _parse_stage_limits(os.getenv("PIPELINE_STAGE_LIMITS"))
+
+
+class AdmissionError(Exception):
+    """Raised when the pipeline is saturated and cannot accept more work."""
+
+
+class StageExecutor:
+    """
+    Runs blocking pipeline stages off the event loop.
+    CPU-bound stages share a bounded thread/process pool, network stages use
+    a separate thread pool, and each stage has its own concurrency limit so a
+    burst of OCR jobs cannot starve classification or embeddings.
+    """
+
+    def __init__(
+        self,
+        pool_kind: str = POOL_KIND,
+        max_workers: int = MAX_WORKERS,
+        io_workers: int = IO_WORKERS,
+        max_inflight: int = MAX_INFLIGHT,
+        max_queued: int = MAX_QUEUED,
+        admission_timeout: float = ADMISSION_TIMEOUT,
+        stage_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.pool_kind = pool_kind
+        self.max_workers = max_workers
+        self.io_workers = io_workers
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.admission_timeout = admission_timeout
+        self.stage_limits = stage_limits or dict(STAGE_LIMITS)
+
+        self._cpu_pool: Optional[Executor] = None
+        self._io_pool: Optional[Executor] = None
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._stage_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.waiting = 0
+        self.running = 0
+
+    def _get_cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if self.pool_kind == "process":
+                # spawn avoids forking a process that already holds torch threads
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._cpu_pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="stage-cpu"
+                )
+            logger.info(
+                f"Started {self.pool_kind} pool with {self.max_workers} workers"
+            )
+        return self._cpu_pool
+
+    def _get_io_pool(self) -> Executor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers, thread_name_prefix="stage-io"
+            )
+        return self._io_pool
+
+    def _stage_semaphore(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self._stage_semaphores:
+            limit = self.stage_limits.get(stage, self.max_workers)
+            self._stage_semaphores[stage] = asyncio.Semaphore(limit)
+        return self._stage_semaphores[stage]
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Reserve a document slot. Rejects immediately when too many documents
+        are already waiting, and after admission_timeout if no slot frees up.
+        """
+        if self.waiting >= self.max_queued:
+            raise AdmissionError(
+                f"Pipeline busy: {self.running} running, {self.waiting} waiting"
+            )
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(
+                self._inflight.acquire(), timeout=self.admission_timeout
+            )
+        except asyncio.TimeoutError:
+            raise AdmissionError(
+                f"Timed out after {self.admission_timeout}s waiting for a pipeline slot"
+            )
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._inflight.release()
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) for the given stage in the matching pool."""
+        pool = self._get_cpu_pool() if stage in CPU_STAGES else self._get_io_pool()
+        async with self._stage_semaphore(stage):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        return {
+            "pool": self.pool_kind,
+            "max_workers": self.max_workers,
+            "max_inflight": self.max_inflight,
+            "running": self.running,
+            "waiting": self.waiting,
+            "stage_limits": self.stage_limits,
+        }
+
+    def shutdown(self):
+        for pool in (self._cpu_pool, self._io_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._cpu_pool = None
+        self._io_pool = None
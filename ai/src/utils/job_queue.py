@@ -0,0 +1,269 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lanes are served strictly in this order; jobs within a lane in FIFO order
+LANES = ("high", "normal", "low")
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """
+    Durable work queue in one SQLite file, shared by the API and worker
+    processes. Workers claim jobs with a lease; reap() hands a job whose worker
+    stopped renewing its lease out again, up to max_attempts in total.
+    complete(), fail() and cancelled() only act for the worker that owns the
+    job, so a worker that lost its lease cannot touch a re-claimed job.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600, retry_backoff: float = 30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, lane INTEGER NOT NULL, status TEXT NOT NULL, "
+            "payload TEXT NOT NULL, result BLOB, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0, indexed INTEGER NOT NULL DEFAULT 0, worker TEXT, "
+            "created_at REAL NOT NULL, available_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, lease_until REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs(status, lane, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_unindexed ON jobs(status, indexed)")
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock from the first read so other processes cannot interleave."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def submit(self, payload: Dict[str, Any], lane: str = "normal", max_attempts: int = 3) -> str:
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}', expected one of {LANES}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._write(
+            "INSERT INTO jobs (id, lane, status, payload, max_attempts, created_at, available_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, LANES.index(lane), QUEUED, json.dumps(payload), max_attempts, now, now),
+        )
+        return job_id
+
+    def reap(self) -> List[dict]:
+        """
+        Settle jobs whose worker stopped renewing its lease: cancelled if a
+        cancel was requested, failed once attempts are used up, otherwise
+        queued again. Returns the payloads of the jobs that finished.
+        """
+        now = time.time()
+        finished = []
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, payload, attempts, max_attempts, cancel_requested FROM jobs "
+                "WHERE status = ? AND lease_until < ?",
+                (RUNNING, now),
+            ).fetchall()
+            for job_id, payload, attempts, max_attempts, cancel_requested in rows:
+                if cancel_requested:
+                    status, error = CANCELLED, None
+                elif attempts >= max_attempts:
+                    status, error = FAILED, "lease expired"
+                else:
+                    status, error = QUEUED, "lease expired"
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, "
+                    "available_at = ?, finished_at = ? WHERE id = ?",
+                    (status, error, now, None if status == QUEUED else now, job_id),
+                )
+                if status != QUEUED:
+                    finished.append(json.loads(payload))
+        return finished
+
+    def claim(self, worker: str, lanes: Iterable[str] = LANES) -> Optional[dict]:
+        """Atomically take the next runnable job, or None when there is none."""
+        lane_ids = [LANES.index(lane) for lane in lanes]
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT id, payload, attempts FROM jobs WHERE status = ? AND available_at <= ? "
+                f"AND lane IN ({','.join('?' * len(lane_ids))}) ORDER BY lane, created_at LIMIT 1",
+                (QUEUED, now, *lane_ids),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, "
+                    "started_at = ?, lease_until = ? WHERE id = ?",
+                    (RUNNING, worker, now, now + self.lease_seconds, row[0]),
+                )
+        if row is None:
+            return None
+        return {"id": row[0], "payload": json.loads(row[1]), "attempt": row[2] + 1}
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Extend the lease; False when the job was cancelled or taken over."""
+        updated = self._write(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ? AND cancel_requested = 0",
+            (time.time() + self.lease_seconds, job_id, worker, RUNNING),
+        )
+        return updated == 1
+
+    def complete(self, job_id: str, worker: str, result: Any) -> bool:
+        """Store the result; False when the worker no longer owns the job."""
+        blob = zlib.compress(json.dumps(result).encode("utf-8"))
+        return self._write(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, blob, time.time(), job_id, worker, RUNNING),
+        ) == 1
+
+    def fail(self, job_id: str, worker: str, error: str) -> Optional[str]:
+        """
+        Record a failed attempt; the job is retried with backoff while attempts
+        remain. Returns the new status, or None when the worker no longer owns
+        the job (its lease expired and the job was settled or re-claimed).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts, cancel_requested FROM jobs WHERE id = ? AND worker = ? AND status = ?",
+                (job_id, worker, RUNNING),
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts, cancel_requested = row
+            if cancel_requested:
+                status, available_at = CANCELLED, now
+            elif attempts < max_attempts:
+                status, available_at = QUEUED, now + self.retry_backoff * 2 ** (attempts - 1)
+            else:
+                status, available_at = FAILED, now
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, available_at = ?, lease_until = NULL, "
+                "finished_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (status, error, available_at, None if status == QUEUED else now, job_id, worker, RUNNING),
+            )
+        return status
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job at once, or ask the worker to stop a running one."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            status = row[0]
+            if status == QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                    (CANCELLED, now, job_id, QUEUED),
+                )
+                return CANCELLED
+            if status == RUNNING:
+                conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING)
+                )
+            return status
+
+    def cancelled(self, job_id: str, worker: str) -> bool:
+        """Mark a running job cancelled once its worker has stopped it."""
+        return self._write(
+            "UPDATE jobs SET status = ?, worker = NULL, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, worker, RUNNING),
+        ) == 1
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, lane, status, payload, error, attempts, max_attempts, cancel_requested, "
+                "created_at, started_at, finished_at, indexed FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row[3])
+        return {
+            "job_id": row[0],
+            "lane": LANES[row[1]],
+            "status": row[2],
+            "file_name": payload.get("file_name"),
+            "document_id": payload.get("document_id"),
+            "error": row[4],
+            "attempts": row[5],
+            "max_attempts": row[6],
+            "cancel_requested": bool(row[7]),
+            "created_at": row[8],
+            "started_at": row[9],
+            "finished_at": row[10],
+            "indexed": bool(row[11]),
+        }
+
+    def payload(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def result(self, job_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def unindexed(self, limit: int = 32) -> list:
+        """(job id, result) of finished jobs whose vectors are not indexed yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, result FROM jobs WHERE status = ? AND indexed = 0 LIMIT ?", (DONE, limit)
+            ).fetchall()
+        return [(job_id, json.loads(zlib.decompress(blob))) for job_id, blob in rows]
+
+    def mark_indexed(self, job_id: str) -> None:
+        self._write("UPDATE jobs SET indexed = 1 WHERE id = ?", (job_id,))
+
+    def depth(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per lane and status."""
+        counts = {lane: {} for lane in LANES}
+        with self._lock:
+            rows = self._conn.execute("SELECT lane, status, COUNT(*) FROM jobs GROUP BY lane, status").fetchall()
+        for lane, status, count in rows:
+            counts[LANES[lane]][status] = count
+        return counts
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs older than the given age in seconds."""
+        cutoff = time.time() - older_than
+        return self._write(
+            f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished_at < ?",
+            (*FINISHED, cutoff),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,73 @@
+import os
+import hashlib
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Uploads are copied in UPLOAD_CHUNK_BYTES pieces to a uniquely named file in
+# UPLOAD_DIR (the system temp dir by default) and hashed on the way, so no
+# request holds the whole file in memory and same-named uploads never collide.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or tempfile.gettempdir()
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "100"))
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass
+class SavedUpload:
+    filename: str
+    path: str
+    size: int
+    sha256: str
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+@asynccontextmanager
+async def saved_upload(
+    file, max_bytes: Optional[int] = None, directory: Optional[str] = None
+) -> AsyncIterator[SavedUpload]:
+    """
+    Stream an UploadFile to a private temp file and yield its path, size and
+    sha256. The file keeps the upload's extension so extractors can open it
+    by path, and it is deleted when the block exits unless the caller has
+    moved it away (os.replace) to keep it.
+    """
+    max_bytes = int(UPLOAD_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+    # Starlette knows the size of a fully received upload; fail before copying
+    if getattr(file, "size", None) and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+
+    filename = file.filename or "upload"
+    suffix = os.path.splitext(os.path.basename(filename))[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=directory or UPLOAD_DIR)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                # Hashing and disk writes stay off the event loop
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+        yield SavedUpload(filename=filename, path=path, size=size, sha256=digest.hexdigest())
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
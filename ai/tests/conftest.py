@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The app runs from src/ (imports are "from pipeline import ..."); the fake
+# LLM server lives with the benchmarks
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
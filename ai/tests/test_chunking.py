@@ -0,0 +1,85 @@
+import pytest
+
+from utils.chunking import CHARS_PER_TOKEN, chunk_text, estimate_tokens, reassemble
+
+TEXT = (
+    "First paragraph opens here. It has two sentences.\n\n"
+    "Second paragraph is a single sentence!\n"
+    "A line of its own? Yes.\n\n"
+    "Last paragraph."
+)
+
+
+def assert_offsets(text, chunks):
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text
+
+
+def test_short_text_is_one_chunk():
+    chunks = chunk_text(TEXT, 1000)
+    assert [c.text for c in chunks] == [TEXT]
+    assert (chunks[0].start, chunks[0].end) == (0, len(TEXT))
+
+
+@pytest.mark.parametrize("max_tokens", [5, 10, 20])
+def test_chunks_respect_budget_and_keep_offsets(max_tokens):
+    chunks = chunk_text(TEXT, max_tokens)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= max_tokens * CHARS_PER_TOKEN for c in chunks)
+    assert_offsets(TEXT, chunks)
+    # Chunks are in order and do not overlap without overlap_tokens
+    assert all(a.end <= b.start for a, b in zip(chunks, chunks[1:]))
+
+
+def test_chunks_break_on_sentence_boundaries():
+    chunks = chunk_text(TEXT, 15)
+    assert all(c.text.endswith((".", "!", "?")) for c in chunks)
+
+
+def test_overlap_repeats_trailing_sentences():
+    text = " ".join(f"Sentence {n}." for n in range(20))
+    chunks = chunk_text(text, 10, overlap_tokens=4)
+    assert_offsets(text, chunks)
+    assert all(b.start < a.end for a, b in zip(chunks, chunks[1:]))
+
+
+def test_long_sentence_is_cut_at_word_boundaries():
+    text = " ".join(["word"] * 100)
+    chunks = chunk_text(text, 5)
+    assert all(len(c.text) <= 20 and c.text.strip("word ") == "" for c in chunks)
+    assert_offsets(text, chunks)
+
+
+def test_long_word_is_hard_split():
+    chunks = chunk_text("x" * 10000, 10)
+    assert len(chunks) == 250
+    assert all(len(c.text) == 40 for c in chunks)
+    text = "short " + "y" * 95 + " tail"
+    chunks = chunk_text(text, 10)
+    assert all(len(c.text) <= 40 for c in chunks)
+    assert_offsets(text, chunks)
+    assert "".join(c.text for c in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_empty_text_has_no_chunks():
+    assert chunk_text("", 10) == []
+    assert chunk_text(" \n\n ", 10) == []
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 100
+
+
+def test_reassemble_keeps_separators_and_order():
+    chunks = chunk_text(TEXT, 15)
+    assert reassemble(TEXT, chunks, [c.text for c in chunks]) == TEXT
+    upper = reassemble(TEXT, chunks, [c.text.upper() for c in chunks])
+    assert upper == TEXT.upper()
+
+
+def test_reassemble_joins_overlapping_chunks_with_a_space():
+    text = " ".join(f"Sentence {n}." for n in range(20))
+    chunks = chunk_text(text, 10, overlap_tokens=4)
+    joined = reassemble(text, chunks, [str(n) for n in range(len(chunks))])
+    assert joined == " ".join(str(n) for n in range(len(chunks)))
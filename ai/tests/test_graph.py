@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from pipeline.graph import StageGraph
+
+
+def stage(value=None, log=None, name=None, delay=0.0):
+    async def fn(ctx):
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(name)
+        return value
+
+    return fn
+
+
+def failing(times, log):
+    """Fails the first `times` calls, then returns "ok"."""
+
+    async def fn(ctx):
+        log.append("call")
+        if len(log) <= times:
+            raise RuntimeError("boom")
+        return "ok"
+
+    return fn
+
+
+def test_runs_in_dependency_order_and_hides_internal_stages():
+    log = []
+    graph = StageGraph()
+    graph.add_stage("summary", stage("s", log, "summary"), deps=("_prepared",))
+    graph.add_stage("_prepared", stage("p", log, "_prepared", delay=0.01), deps=("text",))
+    results = asyncio.run(graph.run({"text": "x"}))
+    assert log == ["_prepared", "summary"]
+    assert results == {"summary": "s"}
+
+
+def test_cycle_is_rejected_and_graph_left_usable():
+    graph = StageGraph()
+    graph.add_stage("a", stage(1), deps=("b",))
+    with pytest.raises(ValueError, match="Cycle"):
+        graph.add_stage("b", stage(2), deps=("a",))
+    assert list(graph.stages) == ["a"]
+    graph.add_stage("b", stage(2))
+    assert graph.order() == ["b", "a"]
+
+
+def test_duplicate_stage_is_rejected():
+    graph = StageGraph().add_stage("a", stage(1))
+    with pytest.raises(ValueError, match="already registered"):
+        graph.add_stage("a", stage(2))
+
+
+def test_unsatisfied_dependency_is_reported():
+    graph = StageGraph().add_stage("a", stage(1), deps=("missing",))
+    with pytest.raises(ValueError, match="missing"):
+        asyncio.run(graph.run({}))
+
+
+def test_optional_stage_failure_yields_none_and_is_reported():
+    graph = StageGraph()
+    graph.add_stage("summary", failing(10, []), optional=True)
+    graph.add_stage("metadata", stage({"m": 1}))
+    failed = set()
+    results = asyncio.run(graph.run({}, failed=failed))
+    assert results == {"summary": None, "metadata": {"m": 1}}
+    assert failed == {"summary"}
+
+
+def test_required_stage_failure_cancels_the_rest():
+    log = []
+    graph = StageGraph()
+    graph.add_stage("broken", failing(10, []))
+    graph.add_stage("slow", stage("late", log, "slow", delay=0.5))
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.run({}))
+    assert log == []
+
+
+def test_stage_retries():
+    log = []
+    graph = StageGraph(stage_retries=2).add_stage("flaky", failing(2, log))
+    assert asyncio.run(graph.run({})) == {"flaky": "ok"}
+    assert len(log) == 3
+
+    log = []
+    graph = StageGraph(stage_retries=2).add_stage("flaky", failing(2, log), retries=0, optional=True)
+    assert asyncio.run(graph.run({})) == {"flaky": None}
+    assert len(log) == 1
+
+
+def test_on_stage_and_timings_cover_public_stages():
+    seen = []
+    timings = {}
+    graph = StageGraph()
+    graph.add_stage("_internal", stage(1))
+    graph.add_stage("public", stage(2), deps=("_internal",))
+    asyncio.run(graph.run({}, on_stage=lambda name, value: seen.append((name, value)), timings=timings))
+    assert seen == [("public", 2)]
+    assert set(timings) == {"_internal", "public"}
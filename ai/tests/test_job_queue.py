@@ -0,0 +1,203 @@
+import threading
+import time
+
+import pytest
+
+from utils.job_queue import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, retry_backoff=0)
+    yield queue
+    queue.close()
+
+
+def expire_leases(queue):
+    queue._write("UPDATE jobs SET lease_until = ? WHERE status = ?", (time.time() - 1, RUNNING))
+
+
+class RaceAfterRead:
+    """Connection wrapper that runs a competing call from another thread right after the first SELECT."""
+
+    def __init__(self, conn, competitor):
+        self._conn = conn
+        self._competitor = competitor
+        self.thread = None
+
+    def execute(self, sql, params=()):
+        cursor = self._conn.execute(sql, params)
+        if sql.startswith("SELECT") and self.thread is None:
+            self.thread = threading.Thread(target=self._competitor)
+            self.thread.start()
+            # Give the competitor the chance to write between our read and write
+            self.thread.join(0.2)
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@pytest.fixture
+def other(tmp_path, queue):
+    # A second connection to the same file stands in for another process
+    other = JobQueue(queue.path, lease_seconds=60, retry_backoff=0)
+    yield other
+    other.close()
+
+
+def test_lanes_are_served_in_priority_then_fifo_order(queue):
+    low = queue.submit({"n": 1}, lane="low")
+    normal_1 = queue.submit({"n": 2})
+    high = queue.submit({"n": 3}, lane="high")
+    normal_2 = queue.submit({"n": 4})
+    claimed = [queue.claim("w")["id"] for _ in range(4)]
+    assert claimed == [high, normal_1, normal_2, low]
+    assert queue.claim("w") is None
+
+
+def test_claim_respects_lane_filter(queue):
+    queue.submit({}, lane="low")
+    assert queue.claim("w", lanes=["high", "normal"]) is None
+    assert queue.claim("w", lanes=["low"]) is not None
+
+
+def test_unknown_lane_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit({}, lane="urgent")
+
+
+def test_complete_stores_result(queue):
+    job_id = queue.submit({"file_name": "a.pdf"})
+    job = queue.claim("w")
+    assert job["attempt"] == 1
+    assert queue.complete(job_id, "w", {"text": "x"})
+    assert queue.status(job_id)["status"] == DONE
+    assert queue.result(job_id) == {"text": "x"}
+
+
+def test_failed_job_is_retried_until_attempts_run_out(queue):
+    job_id = queue.submit({}, max_attempts=2)
+    queue.claim("w")
+    assert queue.fail(job_id, "w", "boom") == QUEUED
+    assert queue.claim("w")["attempt"] == 2
+    assert queue.fail(job_id, "w", "boom again") == FAILED
+    status = queue.status(job_id)
+    assert status["status"] == FAILED and status["error"] == "boom again"
+    assert queue.claim("w") is None
+
+
+def test_retry_waits_for_backoff(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), retry_backoff=60)
+    job_id = queue.submit({})
+    queue.claim("w")
+    assert queue.fail(job_id, "w", "boom") == QUEUED
+    assert queue.claim("w") is None
+    queue.close()
+
+
+def test_cancel_queued_job_is_immediate(queue):
+    job_id = queue.submit({})
+    assert queue.cancel(job_id) == CANCELLED
+    assert queue.claim("w") is None
+    assert queue.cancel("unknown") is None
+
+
+def test_cancel_running_job_stops_heartbeat(queue):
+    job_id = queue.submit({})
+    queue.claim("w")
+    assert queue.heartbeat(job_id, "w")
+    assert queue.cancel(job_id) == RUNNING
+    assert not queue.heartbeat(job_id, "w")
+    assert queue.cancelled(job_id, "w")
+    assert queue.status(job_id)["status"] == CANCELLED
+
+
+def test_expired_lease_is_requeued_and_old_worker_loses_ownership(queue):
+    job_id = queue.submit({"path": "a"})
+    queue.claim("old")
+    expire_leases(queue)
+    assert queue.reap() == []
+    assert queue.claim("new")["attempt"] == 2
+    # The worker that lost its lease can no longer finish or fail the job
+    assert not queue.heartbeat(job_id, "old")
+    assert not queue.complete(job_id, "old", {})
+    assert queue.fail(job_id, "old", "late") is None
+    assert queue.complete(job_id, "new", {"ok": True})
+
+
+def test_expired_lease_with_cancel_request_is_cancelled(queue):
+    job_id = queue.submit({"path": "a"})
+    queue.claim("w")
+    queue.cancel(job_id)
+    expire_leases(queue)
+    assert queue.reap() == [{"path": "a"}]
+    assert queue.status(job_id)["status"] == CANCELLED
+    assert queue.claim("w") is None
+
+
+def test_expired_lease_on_last_attempt_fails(queue):
+    job_id = queue.submit({"path": "a"}, max_attempts=1)
+    queue.claim("w")
+    expire_leases(queue)
+    assert queue.reap() == [{"path": "a"}]
+    status = queue.status(job_id)
+    assert status["status"] == FAILED and status["error"] == "lease expired"
+
+
+def test_depth_and_indexing_bookkeeping(queue):
+    job_id = queue.submit({})
+    queue.submit({}, lane="high")
+    queue.claim("w", lanes=["normal"])
+    queue.complete(job_id, "w", {"document_id": "d"})
+    depth = queue.depth()
+    assert depth["normal"] == {DONE: 1} and depth["high"] == {QUEUED: 1}
+    assert queue.unindexed() == [(job_id, {"document_id": "d"})]
+    queue.mark_indexed(job_id)
+    assert queue.unindexed() == []
+    assert queue.status(job_id)["indexed"]
+
+
+def test_purge_removes_old_finished_jobs(queue):
+    job_id = queue.submit({})
+    queued = queue.submit({}, lane="low")
+    queue.claim("w")
+    queue.complete(job_id, "w", {})
+    assert queue.purge(older_than=-1) == 1
+    assert queue.status(job_id) is None
+    assert queue.status(queued)["status"] == QUEUED
+
+
+def test_cancel_is_not_interleaved_with_a_claim(queue, other):
+    job_id = queue.submit({})
+    claimed = []
+    race = RaceAfterRead(queue._conn, lambda: claimed.append(other.claim("w")))
+    queue._conn = race
+    assert queue.cancel(job_id) == CANCELLED
+    race.thread.join()
+    queue._conn = race._conn
+    # The claim waited for the cancel and found nothing to run
+    assert claimed == [None]
+    assert queue.status(job_id)["status"] == CANCELLED
+
+
+def test_fail_is_not_interleaved_with_a_reap_and_reclaim(queue, other):
+    job_id = queue.submit({})
+    queue.claim("old")
+    expire_leases(queue)
+    claimed = []
+
+    def take_over():
+        other.reap()
+        claimed.append(other.claim("new"))
+
+    race = RaceAfterRead(queue._conn, take_over)
+    queue._conn = race
+    assert queue.fail(job_id, "old", "boom") == QUEUED
+    race.thread.join()
+    queue._conn = race._conn
+    # The retry queued by the old worker is what the new worker claimed
+    assert claimed[0]["attempt"] == 2
+    status = queue.status(job_id)
+    assert status["status"] == RUNNING and status["error"] == "boom"
+    assert queue.complete(job_id, "new", {"ok": True})
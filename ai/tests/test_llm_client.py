@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from fake_llm_server import start_server
+from pipeline import llm_client
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Point the shared client at a fresh fake server with fast backoff."""
+    servers = []
+
+    def start(**kwargs):
+        server, url = start_server(**kwargs)
+        servers.append(server)
+        monkeypatch.setattr(llm_client, "LLM_BASE_URL", url)
+        monkeypatch.setattr(llm_client, "LLM_API_KEY", "test")
+        monkeypatch.setattr(llm_client, "LLM_BACKOFF", 0.01)
+        monkeypatch.setattr(llm_client, "LLM_MAX_BACKOFF", 0.05)
+        monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 3)
+        return server
+
+    yield start
+    asyncio.run(llm_client.close_client())
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def chat(text: str):
+    return llm_client.chat_completion([{"role": "user", "content": f"Echo:\n{text}"}])
+
+
+async def _then_close(coro):
+    try:
+        return await coro
+    finally:
+        await llm_client.close_client()
+
+
+def run(coro):
+    # Each test gets its own event loop, so the client must not outlive it
+    return asyncio.run(_then_close(coro))
+
+
+def test_returns_message_content(fake_llm):
+    server = fake_llm()
+    assert run(chat("hello")).endswith("hello")
+    assert server.requests == 1
+
+
+def test_retries_503_until_success(fake_llm):
+    server = fake_llm(fail_first=2)
+    retries = llm_client.LLM_RETRIES.value()
+    assert run(chat("retry me")).endswith("retry me")
+    assert server.requests == 3
+    assert llm_client.LLM_RETRIES.value() == retries + 2
+
+
+def test_gives_up_after_max_retries(fake_llm):
+    server = fake_llm(fail_rate=1.0)
+    errors = llm_client.LLM_ERRORS.value()
+    with pytest.raises(llm_client.LLMError):
+        run(chat("never"))
+    assert server.requests == llm_client.LLM_MAX_RETRIES + 1
+    assert llm_client.LLM_ERRORS.value() == errors + 1
+
+
+def test_retry_after_header_is_honoured(fake_llm):
+    server = fake_llm(fail_first=1, retry_after=0.3)
+    loop_time = []
+
+    async def timed():
+        start = asyncio.get_running_loop().time()
+        await chat("later")
+        loop_time.append(asyncio.get_running_loop().time() - start)
+
+    run(timed())
+    assert server.requests == 2
+    assert loop_time[0] >= 0.3
+
+
+def test_retry_delay_uses_full_jitter(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF", 1.0)
+    monkeypatch.setattr(llm_client, "LLM_MAX_BACKOFF", 4.0)
+    for attempt, cap in ((0, 1.0), (1, 2.0), (2, 4.0), (5, 4.0)):
+        delays = [llm_client._retry_delay(attempt, None) for _ in range(200)]
+        assert all(0 <= d <= cap for d in delays)
+        # Jittered, not a fixed schedule
+        assert len(set(delays)) > 100
+
+
+def test_identical_concurrent_calls_share_one_request(fake_llm):
+    server = fake_llm(latency=0.2)
+    coalesced = llm_client.LLM_COALESCED.value()
+
+    async def burst():
+        return await asyncio.gather(*(chat("same") for _ in range(5)), chat("other"))
+
+    results = run(burst())
+    assert results[:5] == [results[0]] * 5
+    assert results[5].endswith("other")
+    assert server.requests == 2
+    assert llm_client.LLM_COALESCED.value() == coalesced + 4
+
+
+def test_cancelled_caller_does_not_cancel_shared_request(fake_llm):
+    server = fake_llm(latency=0.2)
+
+    async def scenario():
+        first = asyncio.ensure_future(chat("shared"))
+        second = asyncio.ensure_future(chat("shared"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second
+
+    assert run(scenario()).endswith("shared")
+    assert server.requests == 1
+
+
+def test_missing_api_key_fails_clearly(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_API_KEY", None)
+    with pytest.raises(llm_client.LLMError, match="GROQ_API_KEY"):
+        run(chat("no key"))
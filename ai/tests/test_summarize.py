@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from pipeline import summarize
+from utils.cache import TTLCache
+from utils.chunking import CHARS_PER_TOKEN
+
+
+@pytest.fixture
+def echo_llm(monkeypatch):
+    """Stand-in model that never shrinks its input; records every request."""
+    requests = []
+
+    async def echo(text, language, max_lines):
+        requests.append(text)
+        return text
+
+    monkeypatch.setattr(summarize, "_request_summary", echo)
+    monkeypatch.setattr(summarize, "SUMMARY_CACHE", TTLCache(maxsize=128, ttl=60))
+    monkeypatch.setattr(summarize, "CHUNK_TOKENS", 50)
+    return requests
+
+
+def sentences(count):
+    return " ".join(f"Sentence number {n} of the document." for n in range(count))
+
+
+def test_short_text_is_summarized_in_one_request(echo_llm):
+    text = sentences(3)
+    assert asyncio.run(summarize.summarize_with_groq(text, fallback=False))
+    assert echo_llm == [text]
+
+
+def test_reduce_that_does_not_shrink_stays_within_the_budget(echo_llm):
+    text = sentences(200)
+    assert asyncio.run(summarize.summarize_with_groq(text, fallback=False))
+    budget = summarize.CHUNK_TOKENS * CHARS_PER_TOKEN
+    assert len(echo_llm) > 1
+    assert max(len(request) for request in echo_llm) <= budget
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langdetect")
+
+from fake_llm_server import start_server
+from pipeline import llm_client, translate
+from utils.cache import TTLCache
+from utils.chunking import chunk_text, reassemble
+
+TEXT = "\n\n".join(f"Paragraph {n} has a sentence. And then another one." for n in range(8))
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(translate, "TRANSLATION_CACHE", TTLCache(maxsize=128, ttl=60))
+    monkeypatch.setattr(translate, "CHUNK_TOKENS", 15)
+    monkeypatch.setattr(translate, "CONCURRENCY", 3)
+
+
+@pytest.fixture
+def fake_translator(monkeypatch):
+    """Upper-cases chunks; later chunks finish first, and chunks in fail_on raise."""
+    calls = {"in_flight": 0, "peak": 0, "fail_on": set()}
+    order = {c.text: n for n, c in enumerate(chunk_text(TEXT, 15))}
+
+    async def request(text, target_lang):
+        calls["in_flight"] += 1
+        calls["peak"] = max(calls["peak"], calls["in_flight"])
+        try:
+            await asyncio.sleep(0.01 * (len(order) - order.get(text, 0)))
+            if order.get(text) in calls["fail_on"]:
+                raise RuntimeError("503")
+            return text.upper()
+        finally:
+            calls["in_flight"] -= 1
+
+    monkeypatch.setattr(translate, "_request_translation", request)
+    return calls
+
+
+def test_chunks_are_translated_concurrently_and_kept_in_order(fake_translator):
+    assert len(chunk_text(TEXT, 15)) > 3
+    translated, complete = asyncio.run(translate._translate_checked(TEXT, "en", "ml"))
+    assert complete
+    assert translated == TEXT.upper()
+    # Bounded by CONCURRENCY, but more than one chunk in flight
+    assert fake_translator["peak"] == 3
+
+
+def test_failed_chunk_falls_back_to_source_text(fake_translator):
+    fake_translator["fail_on"] = {1}
+    chunks = chunk_text(TEXT, 15)
+    translated, complete = asyncio.run(translate._translate_checked(TEXT, "en", "ml"))
+    assert not complete
+    outputs = [c.text if n == 1 else c.text.upper() for n, c in enumerate(chunks)]
+    assert translated == reassemble(TEXT, chunks, outputs)
+    assert chunks[1].text in translated and chunks[1].text.upper() not in translated
+
+
+def test_failed_chunk_is_not_cached(fake_translator):
+    fake_translator["fail_on"] = {1}
+    asyncio.run(translate._translate_checked(TEXT, "en", "ml"))
+    fake_translator["fail_on"] = set()
+    translated, complete = asyncio.run(translate._translate_checked(TEXT, "en", "ml"))
+    assert complete and translated == TEXT.upper()
+
+
+def test_context_records_fallbacks(fake_translator):
+    fake_translator["fail_on"] = {0}
+    context = translate.TranslationContext()
+    assert asyncio.run(context.to_malayalam(TEXT, source_lang="en")) != TEXT.upper()
+    assert context.fallbacks == {"ml"}
+    assert asyncio.run(context.to_english(TEXT, source_lang="ml")) != TEXT.upper()
+    assert context.fallbacks == {"ml", "en"}
+
+
+def test_context_without_failures_has_no_fallbacks(fake_translator):
+    context = translate.TranslationContext()
+    assert asyncio.run(context.to_english(TEXT, source_lang="ml")) == TEXT.upper()
+    assert context.fallbacks == set()
+
+
+def test_same_language_is_returned_untranslated(fake_translator):
+    assert asyncio.run(translate._translate_checked(TEXT, "en", "en")) == (TEXT, True)
+    assert fake_translator["peak"] == 0
+
+
+def test_translates_through_the_llm_client(monkeypatch):
+    server, url = start_server()
+    monkeypatch.setattr(llm_client, "LLM_BASE_URL", url)
+    monkeypatch.setattr(llm_client, "LLM_API_KEY", "test")
+
+    async def run():
+        try:
+            return await translate._translate_checked(TEXT, "en", "ml")
+        finally:
+            await llm_client.close_client()
+
+    try:
+        translated, complete = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+    chunks = chunk_text(TEXT, 15)
+    assert complete
+    assert server.requests == len(chunks)
+    # The fake server echoes each chunk back behind a "[<model>] " tag
+    assert [part.split("] ", 1)[1] for part in translated.split("\n\n")] == TEXT.split("\n\n")